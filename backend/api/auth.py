@@ -2,45 +2,58 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
+import uuid
 from fastapi.security import HTTPAuthorizationCredentials
 
-from models.user import User
+from models.user import User, normalize_username
 from models.token import TokenTable
 from models.password_reset import PasswordReset
 from schemas.user import UserCreate, UserLogin, UserOut, ForgotPasswordRequest, ResetPasswordRequest, VerifyResetCodeRequest, TokenResponse, RefreshTokenRequest, UpdateAvatarRequest
 from config.database import get_db
 from config.settings import settings
-from utils.auth_utils import create_access_token, create_refresh_token, hash_password, verify_password, get_current_user, oauth2_scheme, verify_refresh_token
+from utils.auth_utils import create_access_token, create_refresh_token, hash_password, verify_password, get_current_user, oauth2_scheme, verify_refresh_token, token_digest, decode_token_payload, get_token_jti, password_needs_rehash
+from utils.password_hasher import password_hasher
+from utils.principal_cache import principal_cache
+from utils.revocation_list import revocation_list
 from utils.email_service import email_service
 from datetime import datetime, timedelta
 
 router = APIRouter(tags=["auth"])
 
+# Unique constraints/indexes on users that signup can trip, and the 400 each maps to
+SIGNUP_CONSTRAINT_ERRORS = {
+    "users_username_key": "Username already taken",
+    "ix_users_username_normalized": "Username already taken",
+    "users_email_key": "Email already registered",
+}
+
+
+def integrity_constraint_name(error: IntegrityError):
+    """Name of the violated constraint; asyncpg's error sits behind the SQLAlchemy adapter's __cause__"""
+    orig = error.orig
+    name = getattr(orig, "constraint_name", None)
+    if name is None:
+        name = getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    return name
+
 @router.post("/signup", response_model=TokenResponse, status_code=201)
 async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
-    # Check if username already exists
-    result = await db.execute(select(User).where(User.username == user.username))
-    if result.scalars().first():
-        raise HTTPException(400, "Username already taken")
-    
-    # Check if email already exists
-    result = await db.execute(select(User).where(User.email == user.email))
-    if result.scalars().first():
-        raise HTTPException(400, "Email already registered")
-
+    # Ids and timestamps are generated here so the user and token rows can be
+    # written together in one transaction without reading anything back
     db_user = User(
+        id=uuid.uuid4(),
         username=user.username,
+        username_normalized=normalize_username(user.username),
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await hash_password(user.password),
         city=user.city.lower().strip() if user.city else None,
-        avatar_seed=user.avatar_seed
+        avatar_seed=user.avatar_seed,
+        created_at=datetime.utcnow()
     )
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
 
     # Create both access and refresh tokens
     access_token, access_expires = create_access_token(data={"sub": user.username})
@@ -51,12 +64,25 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
         user_id=db_user.id,
         access_token=access_token,
         refresh_token=refresh_token,
+        access_token_digest=token_digest(access_token),
+        refresh_token_digest=token_digest(refresh_token),
+        access_token_jti=get_token_jti(access_token),
         access_token_expires=access_expires,
         refresh_token_expires=refresh_expires,
         status=True
     )
-    db.add(token_record)
-    await db.commit()
+    db.add_all([db_user, token_record])
+    
+    # The unique constraints on users decide whether the username/email is
+    # free; map a violation back to the same 400s the pre-checks used to give
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        message = SIGNUP_CONSTRAINT_ERRORS.get(integrity_constraint_name(e))
+        if message is None:
+            raise
+        raise HTTPException(400, message)
     
     return {
         "access_token": access_token,
@@ -75,20 +101,29 @@ async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/login", response_model=TokenResponse)
 async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.username == user.username))
+    result = await db.execute(select(User).where(User.username_normalized == normalize_username(user.username)))
     db_user = result.scalars().first()
-    if not db_user or not verify_password(user.password, db_user.password_hash):
+    if not db_user or not await verify_password(user.password, db_user.password_hash):
         raise HTTPException(401, "Invalid credentials")
 
+    # Transparently move the stored hash to the current bcrypt cost;
+    # it is committed together with the new token row below
+    if password_needs_rehash(db_user.password_hash):
+        db_user.password_hash = await hash_password(user.password)
+        password_hasher.rehashed += 1
+
     # Create both access and refresh tokens
-    access_token, access_expires = create_access_token(data={"sub": user.username})
-    refresh_token, refresh_expires = create_refresh_token(data={"sub": user.username})
+    access_token, access_expires = create_access_token(data={"sub": db_user.username})
+    refresh_token, refresh_expires = create_refresh_token(data={"sub": db_user.username})
     
     # Store tokens in database
     token_record = TokenTable(
         user_id=db_user.id,
         access_token=access_token,
         refresh_token=refresh_token,
+        access_token_digest=token_digest(access_token),
+        refresh_token_digest=token_digest(refresh_token),
+        access_token_jti=get_token_jti(access_token),
         access_token_expires=access_expires,
         refresh_token_expires=refresh_expires,
         status=True
@@ -130,43 +165,20 @@ async def validate_token(current_user: User = Depends(get_current_user)):
 @router.post("/logout")
 async def logout(dependencies: HTTPAuthorizationCredentials = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     token = dependencies.credentials
-    payload = jwt.decode(token, settings.SECRET_KEY, settings.ALGORITHM)
-    user_id = payload['sub']
-    
-    # Get user to get user_id as UUID
-    result = await db.execute(select(User).where(User.username == user_id))
-    db_user = result.scalars().first()
-    if not db_user:
-        raise HTTPException(404, "User not found")
-    
-    # Clean up old tokens (older than 1 day)
-    token_result = await db.execute(select(TokenTable))
-    token_records = token_result.scalars().all()
-    info = []
-    for record in token_records:
-        if (datetime.utcnow() - record.created_date).days > 1:
-            info.append(record.user_id)
-    
-    if info:
-        # Delete old tokens
-        from sqlalchemy import delete
-        await db.execute(delete(TokenTable).where(TokenTable.user_id.in_(info)))
-        await db.commit()
+    payload = decode_token_payload(token)
+    token_key = token_digest(token)
+    principal_cache.invalidate(token_key)
+    revocation_list.revoke(payload.get("jti"), datetime.utcfromtimestamp(payload["exp"]))
     
-    # Find and invalidate current token
-    existing_token_result = await db.execute(
-        select(TokenTable).filter(
-            TokenTable.user_id == db_user.id, 
-            TokenTable.access_token == token
-        )
+    # Revoke the current token with a single indexed UPDATE;
+    # expired and revoked rows are cleaned up by the background token reaper
+    from sqlalchemy import update
+    await db.execute(
+        update(TokenTable)
+        .where(TokenTable.access_token_digest == token_key)
+        .values(status=False, revoked_at=datetime.utcnow())
     )
-    existing_token = existing_token_result.scalars().first()
-    
-    if existing_token:
-        existing_token.status = False
-        db.add(existing_token)
-        await db.commit()
-        await db.refresh(existing_token)
+    await db.commit()
     
     return {"message": "Logout Successfully"}
 
@@ -179,46 +191,81 @@ async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends
     payload = verify_refresh_token(request.refresh_token)
     username = payload.get("sub")
     
-    # Get user
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(404, "User not found")
-    
-    # Find the token record with this refresh token
-    token_result = await db.execute(
-        select(TokenTable).filter(
-            TokenTable.user_id == user.id,
-            TokenTable.refresh_token == request.refresh_token,
-            TokenTable.status == True
-        )
-    )
-    token_record = token_result.scalars().first()
-    
-    if not token_record:
-        raise HTTPException(401, "Invalid refresh token")
-    
-    # Check if refresh token is expired
-    if token_record.refresh_token_expires and datetime.utcnow() > token_record.refresh_token_expires:
-        # Invalidate the token record
-        token_record.status = False
-        db.add(token_record)
-        await db.commit()
-        raise HTTPException(401, "Refresh token expired")
-    
     # Create new access token (and optionally new refresh token)
     new_access_token, access_expires = create_access_token(data={"sub": username})
     new_refresh_token, refresh_expires = create_refresh_token(data={"sub": username})
     
-    # Update token record with new tokens
-    token_record.access_token = new_access_token
-    token_record.refresh_token = new_refresh_token
-    token_record.access_token_expires = access_expires
-    token_record.refresh_token_expires = refresh_expires
-    
-    db.add(token_record)
+    # Rotate with one compare-and-swap UPDATE. The CAS conditions sit on the
+    # updated row itself, so Postgres re-checks them after waiting on a row
+    # lock and only one of several concurrent retries can win. The subquery
+    # folds in the user check and exposes the old access token for eviction
+    # and revocation.
+    old_refresh_digest = token_digest(request.refresh_token)
+    now = datetime.utcnow()
+    current = (
+        select(
+            TokenTable.id,
+            TokenTable.access_token.label("old_access_token"),
+            TokenTable.access_token_digest.label("old_access_token_digest"),
+            TokenTable.access_token_jti.label("old_access_token_jti"),
+            TokenTable.access_token_expires.label("old_access_token_expires")
+        )
+        .join(User, User.id == TokenTable.user_id)
+        .where(
+            TokenTable.refresh_token_digest == old_refresh_digest,
+            User.username_normalized == normalize_username(username)
+        )
+        .subquery()
+    )
+    from sqlalchemy import update, or_
+    rotate_result = await db.execute(
+        update(TokenTable)
+        .where(
+            TokenTable.id == current.c.id,
+            TokenTable.refresh_token_digest == old_refresh_digest,
+            TokenTable.status == True,
+            or_(TokenTable.refresh_token_expires.is_(None), TokenTable.refresh_token_expires > now)
+        )
+        .values(
+            access_token=new_access_token,
+            refresh_token=new_refresh_token,
+            access_token_digest=token_digest(new_access_token),
+            refresh_token_digest=token_digest(new_refresh_token),
+            access_token_jti=get_token_jti(new_access_token),
+            access_token_expires=access_expires,
+            refresh_token_expires=refresh_expires
+        )
+        .returning(
+            TokenTable.user_id,
+            current.c.old_access_token,
+            current.c.old_access_token_digest,
+            current.c.old_access_token_jti,
+            current.c.old_access_token_expires
+        )
+    )
+    rotated = rotate_result.first()
+    if rotated is None:
+        raise HTTPException(401, "Invalid or expired refresh token")
+
+    # In stateless mode the old access token would stay valid until it expires;
+    # record it as a revoked row so every worker's revocation list picks it up
+    # (the token reaper deletes it once it has expired)
+    if rotated.old_access_token_jti:
+        db.add(TokenTable(
+            user_id=rotated.user_id,
+            access_token=rotated.old_access_token,
+            access_token_digest=rotated.old_access_token_digest,
+            access_token_jti=rotated.old_access_token_jti,
+            access_token_expires=rotated.old_access_token_expires,
+            status=False,
+            revoked_at=now
+        ))
     await db.commit()
     
+    # The old access token stops matching the record, so drop its cached principal
+    principal_cache.invalidate(rotated.old_access_token_digest)
+    revocation_list.revoke(rotated.old_access_token_jti, rotated.old_access_token_expires)
+    
     return {
         "access_token": new_access_token,
         "refresh_token": new_refresh_token,
@@ -337,18 +384,22 @@ async def reset_password(request: ResetPasswordRequest, db: AsyncSession = Depen
         raise HTTPException(400, "Invalid or expired reset code")
     
     # Update user password
-    user.password_hash = hash_password(request.new_password)
+    user.password_hash = await hash_password(request.new_password)
     
     # Mark reset code as used
     reset_record.is_used = True
     
     # Invalidate all existing tokens for this user (force re-login)
     from sqlalchemy import update
-    await db.execute(
+    revoked_result = await db.execute(
         update(TokenTable)
-        .where(TokenTable.user_id == user.id)
-        .values(status=False)
+        .where(TokenTable.user_id == user.id, TokenTable.status == True)
+        .values(status=False, revoked_at=datetime.utcnow())
+        .returning(TokenTable.access_token_jti, TokenTable.access_token_expires)
     )
+    for jti, expires in revoked_result.all():
+        revocation_list.revoke(jti, expires)
+    principal_cache.invalidate_user(user.id)
     
     # Commit changes
     db.add(user)
@@ -372,6 +423,7 @@ async def update_avatar(
     db.add(current_user)
     await db.commit()
     await db.refresh(current_user)
+    principal_cache.invalidate_user(current_user.id)
     
     return current_user
 
@@ -387,7 +439,7 @@ async def get_user_profile(username: str, db: AsyncSession = Depends(get_db)):
     """
     Get user profile by username (for displaying other users' info like avatars)
     """
-    result = await db.execute(select(User).where(User.username == username))
+    result = await db.execute(select(User).where(User.username_normalized == normalize_username(username)))
     user = result.scalars().first()
     
     if not user:
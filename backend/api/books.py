@@ -1,65 +1,179 @@
 # api/books.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func, or_, and_, insert, literal, literal_column, tuple_, String
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
 
 from models.book import Book
 from models.user import User
-from schemas.book import BookOut, BookCreate, BookUpdate
+from models.work import Work, make_work_key
+from schemas.book import BookOut, BookCreate, BookUpdate, LocalBookResult, LocalBookSearchPage, BookImportReport
 from schemas.user import UserOut
 from config.database import get_db
+from config.settings import settings
 from utils.auth_utils import get_current_user
 from utils.google_books import search_google_books
+from utils.thumbnail_enricher import thumbnail_enricher
+from utils.city_title_index import city_title_index, title_key
+from utils.pagination import encode_cursor, decode_cursor, page_limit, NEXT_CURSOR_HEADER
+from utils.book_import import read_import_body, iter_import_rows, validate_import_row, normalize_isbn
+from utils.works import ensure_works, get_or_create_work, needs_enrichment
 
 router = APIRouter(prefix="/books", tags=["books"])
 
 @router.post("/", response_model=BookOut, status_code=201)
 async def add_book(book: BookCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Search for thumbnail from Google Books API
-    thumbnail_url = None
-    try:
-        google_books = await search_google_books(book.title, max_results=10)
-        if google_books and len(google_books) > 0:
-            thumbnail_url = google_books[0].get("thumbnail")
-            print(f"Found thumbnail for '{book.title}': {thumbnail_url}")
-    except Exception as e:
-        print(f"Failed to fetch thumbnail for '{book.title}': {str(e)}")
-    
+    isbn = None
+    if book.isbn:
+        isbn = normalize_isbn(book.isbn)
+        if isbn is None:
+            raise HTTPException(400, f"Invalid ISBN '{book.isbn}'")
+
+    # Copies of the same work share one catalog entry and its thumbnail
+    work = await get_or_create_work(db, book.title, book.author, isbn)
     db_book = Book(
         title=book.title, 
         author=book.author, 
         owner_id=current_user.id, 
         owner_username=current_user.username,
-        thumbnail=thumbnail_url
+        work_id=work.id,
+        thumbnail=work.thumbnail
     )
     db.add(db_book)
     await db.commit()
     await db.refresh(db_book)
+    city_title_index.add(current_user.city, current_user.id, db_book.title)
+    
+    # Thumbnail is looked up in the background (once per work) and written once found
+    if needs_enrichment(work.thumbnail, work.enriched_at):
+        thumbnail_enricher.enqueue(work.id, db_book.title, isbn)
     return db_book
 
+@router.post("/import", response_model=BookImportReport)
+async def import_books(request: Request, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Add many books at once from a JSON list (or {"books": [...]}) or a CSV
+    body (Content-Type: text/csv) with title, author and/or isbn columns.
+    Valid rows are inserted in one transaction; every row gets a status.
+    Thumbnails, and the titles of ISBN-only rows (stored under the ISBN
+    until then), are filled in afterwards by the background enricher.
+    """
+    body = await read_import_body(request, settings.BOOK_IMPORT_MAX_BYTES)
+
+    # Single pass over the rows: validate, and stop as soon as the cap is exceeded
+    results = []
+    accepted = []  # (result, {"title", "author", "isbn"})
+    for row_number, raw in enumerate(iter_import_rows(request.headers.get("content-type", ""), body), start=1):
+        if row_number > settings.BOOK_IMPORT_MAX_ROWS:
+            raise HTTPException(413, f"Import is limited to {settings.BOOK_IMPORT_MAX_ROWS} rows")
+        row, error = validate_import_row(raw)
+        result = {"row": row_number, "status": "invalid", "title": row["title"] if row else None, "error": error}
+        results.append(result)
+        if row:
+            accepted.append((result, row))
+
+    # ISBN-only rows are stored straight away under the ISBN as a provisional
+    # title; the background enricher looks the ISBN up and renames them, so
+    # the request never waits on Google Books
+    created_at = datetime.utcnow()
+    new_books = []  # (result, values, work key, isbn)
+    for result, row in accepted:
+        new_books.append((result, {
+            "id": uuid4(),
+            "title": row["title"] or row["isbn"],
+            "author": row["author"],
+            "owner_id": current_user.id,
+            "owner_username": current_user.username,
+            "created_at": created_at,
+            "thumbnail": None,
+        }, make_work_key(row["title"], row["author"], row["isbn"]), row["isbn"]))
+
+    # Resolve works, then batched executemany inserts, committed together
+    try:
+        works = await ensure_works(db, (
+            (row["title"] or row["isbn"], row["author"], row["isbn"], None)
+            for _, row in accepted
+        ))
+        for _, values, key, isbn in new_books:
+            values["work_id"] = works[key].id
+            values["thumbnail"] = works[key].thumbnail
+            if values["title"] == isbn:
+                # An earlier copy may already have resolved this ISBN's title
+                values["title"] = works[key].title
+
+        for start in range(0, len(new_books), settings.BOOK_IMPORT_BATCH_SIZE):
+            batch = new_books[start:start + settings.BOOK_IMPORT_BATCH_SIZE]
+            await db.execute(insert(Book), [values for _, values, _, _ in batch])
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Error importing books for {current_user.username}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to import books: {str(e)}")
+
+    for result, values, key, isbn in new_books:
+        provisional = values["title"] == isbn
+        result.update(status="created", book_id=values["id"], error=None)
+        if not provisional:
+            result["title"] = values["title"]
+        city_title_index.add(current_user.city, current_user.id, values["title"])
+        # A work still titled by its ISBN is looked up even if it was tried before
+        if provisional or needs_enrichment(values["thumbnail"], works[key].enriched_at):
+            thumbnail_enricher.enqueue(values["work_id"], values["title"], isbn)
+
+    print(f"Imported {len(new_books)} of {len(results)} books for user {current_user.username}")
+    return {
+        "total": len(results),
+        "created": len(new_books),
+        "failed": len(results) - len(new_books),
+        "results": results,
+    }
+
+# Columns behind BookOut, selected directly so listings never build ORM objects
+BOOK_OUT_COLUMNS = (Book.id, Book.title, Book.author, Book.owner_id, Book.owner_username, Book.created_at, Book.thumbnail)
+
 @router.get("/", response_model=list[BookOut])
-async def get_my_books(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_my_books(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    My books, newest first. Without `limit` every book is returned; with it,
+    up to `limit` books (capped) and, when more remain, the X-Next-Cursor
+    header holds the `cursor` for the next page.
+    """
+    limit = page_limit(limit, settings.BOOK_LIST_MAX_LIMIT)
+    conditions = [Book.owner_id == current_user.id]
+
+    # Keyset on (created_at DESC, id DESC): resume strictly after the last row returned
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_created_at, last_id = datetime.fromisoformat(position["created_at"]), UUID(position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Invalid cursor")
+        conditions.append(tuple_(Book.created_at, Book.id) < tuple_(last_created_at, last_id))
+
     try:
         print(f"Getting books for user: {current_user.username} (ID: {current_user.id})")
-        result = await db.execute(select(Book).where(Book.owner_id == current_user.id))
-        books = result.scalars().all()
-        
-        # For existing books without thumbnails, fetch and update them
-        for book in books:
-            if not book.thumbnail:
-                try:
-                    google_books = await search_google_books(book.title, max_results=1)
-                    if google_books and len(google_books) > 0:
-                        thumbnail_url = google_books[0].get("thumbnail")
-                        if thumbnail_url:
-                            book.thumbnail = thumbnail_url
-                            db.add(book)  # Mark for update
-                            print(f"Updated thumbnail for existing book '{book.title}': {thumbnail_url}")
-                except Exception as e:
-                    print(f"Failed to fetch thumbnail for existing book '{book.title}': {str(e)}")
-        
-        # Commit any thumbnail updates
-        await db.commit()
+        result = await db.stream(
+            select(*BOOK_OUT_COLUMNS)
+            .where(*conditions)
+            .order_by(Book.created_at.desc(), Book.id.desc())
+            .limit(limit + 1 if limit else None)
+            .execution_options(yield_per=100)
+        )
+        books = [dict(row) async for row in result.mappings()]
+
+        if limit and len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"created_at": last["created_at"].isoformat(), "id": str(last["id"])})
         
         print(f"Found {len(books)} books for user {current_user.username}")
         return books
@@ -72,6 +186,8 @@ async def search_books(query: str, db: AsyncSession = Depends(get_db), current_u
     if not query.strip():
         return []
 
+    # End the auth lookup's transaction so no pooled connection is held while waiting on Google
+    await db.commit()
     google_books = await search_google_books(query)
 
     # Check if current user has a city
@@ -79,80 +195,176 @@ async def search_books(query: str, db: AsyncSession = Depends(get_db), current_u
         print(f"Current user {current_user.username} has no city set")
         return google_books
 
-    print(f"Searching for users in city: {current_user.city}")
-    
-    # Get users in the same city (excluding current user)
-    city_users_result = await db.execute(
-        select(User).where(
-            User.city == current_user.city, 
-            User.username != current_user.username
-        )
-    )
-    city_users = city_users_result.scalars().all()
-    print(f"Found {len(city_users)} users in city {current_user.city}")
+    print(f"Searching for books available in city: {current_user.city}")
     
-    if not city_users:
-        print(f"No other users found in city {current_user.city}")
+    result_titles = {title_key(book["title"]) for book in google_books}
+    if not result_titles:
         return google_books
-    
-    # Extract user IDs
-    city_user_ids = [user.id for user in city_users]
-    print(f"City user IDs: {city_user_ids}")
-
-    # Get books owned by users in the same city
-    city_books_result = await db.execute(select(Book).where(Book.owner_id.in_(city_user_ids)))
-    city_books = city_books_result.scalars().all()
-    print(f"Found {len(city_books)} books owned by users in {current_user.city}")
-    
-    # Create a set of book titles (lowercase for case-insensitive matching)
-    city_book_titles = {book.title.lower() for book in city_books}
-    print(f"Available book titles in city: {city_book_titles}")
+
+    if settings.CITY_TITLE_INDEX_ENABLED and city_title_index.ready:
+        local_counts = city_title_index.owner_counts(current_user.city, result_titles, exclude_owner_id=current_user.id)
+    else:
+        # Index still building (or disabled): count owners per title among
+        # other users in the same city with one grouped query, matching the
+        # titles Google returned against works and joining copies on work_id
+        counts_result = await db.execute(
+            select(Work.title_key, func.count(func.distinct(Book.owner_id)))
+            .join(Book, Book.work_id == Work.id)
+            .join(User, User.id == Book.owner_id)
+            .where(
+                User.city == current_user.city,
+                User.id != current_user.id,
+                Work.title_key.in_(result_titles)
+            )
+            .group_by(Work.title_key)
+        )
+        local_counts = dict(counts_result.all())
+    print(f"Available book titles in city: {local_counts}")
 
     # Add availability information to Google Books results
     for book in google_books:
-        title_lower = book["title"].lower()
-        book["available_in_city"] = title_lower in city_book_titles
-        book["local_owners_count"] = sum(1 for city_book in city_books if city_book.title.lower() == title_lower)
+        local_owners_count = local_counts.get(title_key(book["title"]), 0)
+        book["available_in_city"] = local_owners_count > 0
+        book["local_owners_count"] = local_owners_count
         print(f"Book '{book['title']}' - Available in city: {book['available_in_city']}, Local owners: {book['local_owners_count']}")
 
     return google_books
 
+@router.get("/local-search", response_model=LocalBookSearchPage)
+async def local_search_books(
+    q: str,
+    city: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full-text search over books that BookSwap users own, ranked by relevance.
+    Defaults to the caller's city; pass `next_cursor` back as `cursor` to page.
+    """
+    if not q.strip():
+        return {"items": [], "next_cursor": None}
+
+    ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+    rank = func.ts_rank(Book.search_vector, ts_query)
+
+    conditions = [
+        Book.search_vector.op("@@")(ts_query),
+        User.id != current_user.id
+    ]
+    search_city = city.lower().strip() if city else current_user.city
+    if search_city:
+        conditions.append(User.city == search_city)
+
+    # Keyset on (rank DESC, id ASC): resume strictly after the last row returned
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_rank, last_id = float(position["rank"]), UUID(position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Invalid cursor")
+        conditions.append(or_(rank < last_rank, and_(rank == last_rank, Book.id > last_id)))
+
+    result = await db.execute(
+        select(Book, User.city, rank.label("rank"))
+        .join(User, User.id == Book.owner_id)
+        .where(*conditions)
+        .order_by(rank.desc(), Book.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+
+    items = [
+        LocalBookResult(
+            **BookOut.model_validate(book).model_dump(),
+            owner_city=owner_city,
+            rank=book_rank
+        )
+        for book, owner_city, book_rank in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor({"rank": last.rank, "id": str(last.id)})
+
+    return {"items": items, "next_cursor": next_cursor}
+
 @router.get("/search-owners", response_model=list[UserOut])
 async def search_book_owners(
+    response: Response,
     book_title: str,
     book_id: str = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Find all users in my city who own the given book.
     Returns each user only once, even if they own multiple copies of the same book.
+    Titles are matched fuzzily (pg_trgm), so small typos still find owners;
+    owners of the closest-matching copies come first. Without `limit` every
+    owner is returned; with it, when more owners remain, the X-Next-Cursor
+    header holds the `cursor` for the next page.
     """
     if not book_title.strip():
         return []
 
-    # Build the query conditions
+    limit = page_limit(limit, settings.OWNER_SEARCH_MAX_RESULTS)
+
+    # `<%` reads this threshold; set it for this transaction only
+    await db.execute(
+        select(func.set_config(
+            "pg_trgm.word_similarity_threshold",
+            str(settings.OWNER_SEARCH_SIMILARITY_THRESHOLD),
+            True
+        ))
+    )
+
+    # Titles are matched on the (much smaller) works table; both predicates are
+    # served by its trigram index: substring matches as before, plus close
+    # matches that tolerate typos. Copies are then joined on work_id.
+    title_query = literal(book_title, String)
+    score = func.max(func.word_similarity(title_query, Work.title))
     query_conditions = [
-        Book.title.ilike(f"%{book_title}%"),
+        or_(Work.title.ilike(f"%{book_title}%"), title_query.op("<%")(Work.title)),
         User.city == current_user.city,
         User.id != current_user.id  # Exclude self
     ]
     
-    # If book_id is provided (local database book ID), add it to get specific book
+    # If book_id is provided (local database book ID), find owners of that same work
     if book_id and book_id.strip():
-        query_conditions.append(Book.id == book_id)
+        query_conditions.append(Book.work_id == select(Book.work_id).where(Book.id == book_id).scalar_subquery())
 
-    # Find users in the same city who own the book
-    # Use DISTINCT on User.id to ensure each user appears only once
-    result = await db.execute(
-        select(User)
+    # Keyset on (score DESC, id ASC), matching the relevance order
+    page_conditions = []
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            last_score, last_id = float(position["score"]), UUID(position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(400, "Invalid cursor")
+        page_conditions.append(or_(score < last_score, and_(score == last_score, User.id > last_id)))
+
+    # Find users in the same city who own the book, one row per user
+    # ranked by their best-matching copy
+    result = await db.stream(
+        select(User.id, User.username, User.email, User.city, User.avatar_seed, score.label("score"))
         .join(Book, User.id == Book.owner_id)
+        .join(Work, Work.id == Book.work_id)
         .where(*query_conditions)
-        .distinct(User.id)
+        .group_by(User.id)
+        .having(*page_conditions)
+        .order_by(score.desc(), User.id)
+        .limit(limit + 1 if limit else None)
+        .execution_options(yield_per=100)
     )
-    owners = result.scalars().all()
+    owners = [dict(row) async for row in result.mappings()]
 
     if not owners:
+        if cursor:
+            return []
         search_criteria = f"'{book_title}'"
         if book_id:
             search_criteria += f" with ID '{book_id}'"
@@ -161,6 +373,11 @@ async def search_book_owners(
             detail=f"No users in {current_user.city} own {search_criteria}"
         )
 
+    if limit and len(owners) > limit:
+        owners = owners[:limit]
+        last = owners[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"score": last["score"], "id": str(last["id"])})
+
     return owners
 
 @router.put("/{book_id}", response_model=BookOut)
@@ -191,26 +408,29 @@ async def update_book(
         
         # Update fields if provided
         update_data = book_update.dict(exclude_unset=True)
-        
-        # If title is being updated, try to fetch new thumbnail
-        if 'title' in update_data:
-            try:
-                google_books = await search_google_books(update_data['title'], max_results=1)
-                if google_books and len(google_books) > 0:
-                    thumbnail_url = google_books[0].get("thumbnail")
-                    if thumbnail_url:
-                        update_data['thumbnail'] = thumbnail_url
-                        print(f"Updated thumbnail for book '{update_data['title']}': {thumbnail_url}")
-            except Exception as e:
-                print(f"Failed to fetch thumbnail for updated book '{update_data['title']}': {str(e)}")
+        old_title = book.title
         
         # Apply updates
         for field, value in update_data.items():
             setattr(book, field, value)
+
+        # A new title or author makes this a copy of a different work
+        work = None
+        if 'title' in update_data or 'author' in update_data:
+            work = await get_or_create_work(db, book.title, book.author)
+            if work.id != book.work_id:
+                book.work_id = work.id
+                book.thumbnail = work.thumbnail
         
         await db.commit()
         await db.refresh(book)
         
+        # If title was updated, fetch a new thumbnail in the background
+        if 'title' in update_data:
+            city_title_index.rename(current_user.city, current_user.id, old_title, book.title)
+        if work is not None and needs_enrichment(book.thumbnail, work.enriched_at):
+            thumbnail_enricher.enqueue(work.id, book.title)
+        
         print(f"Updated book {book_id} for user {current_user.username}")
         return book
         
@@ -247,6 +467,7 @@ async def delete_book(
         # Use the session to delete the book
         await db.delete(book)
         await db.commit()
+        city_title_index.remove(current_user.city, current_user.id, book_title)
         
         print(f"Deleted book '{book_title}' (ID: {book_id}) for user {current_user.username}")
         return {"message": f"Book '{book_title}' deleted successfully"}
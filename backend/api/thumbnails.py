@@ -0,0 +1,68 @@
+# api/thumbnails.py
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlalchemy.future import select
+from typing import Optional
+from uuid import UUID
+
+from models.book import Book
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from utils.thumbnail_store import thumbnail_store, ThumbnailFetchError
+
+router = APIRouter(prefix="/thumbnails", tags=["thumbnails"])
+
+def pick_width(requested: Optional[int]) -> Optional[int]:
+    """Smallest configured variant at least as wide as requested (None = original)"""
+    if requested is None or not thumbnail_store.widths:
+        return None
+    for width in thumbnail_store.widths:
+        if width >= requested:
+            return width
+    return thumbnail_store.widths[-1]
+
+def if_none_match(header: str) -> list:
+    """ETags listed in an If-None-Match header, weak ones (W/) as their opaque tag"""
+    etags = []
+    for value in header.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value:
+            etags.append(value)
+    return etags
+
+@router.get("/{book_id}")
+async def get_thumbnail(book_id: UUID, request: Request, w: Optional[int] = None):
+    """
+    A book's cover, fetched from its source once and served from the local
+    cache. Pass `w` for a resized variant; responses carry a strong ETag
+    and honour If-None-Match. Public, so image caches and CDNs can keep it.
+    """
+    # Short-lived session: don't hold a pooled connection while the cover downloads
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Book.thumbnail).where(Book.id == book_id))
+        source_url = result.scalar_one_or_none()
+    if not source_url:
+        raise HTTPException(status_code=404, detail="No thumbnail for this book")
+
+    width = pick_width(w)
+    try:
+        digest = await thumbnail_store.content_hash(source_url)
+    except ThumbnailFetchError as e:
+        raise HTTPException(status_code=502, detail=f"Could not fetch cover: {str(e)}")
+
+    etag = thumbnail_store.etag(digest, width)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.THUMBNAIL_CACHE_MAX_AGE_SECONDS}",
+    }
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    client_etags = if_none_match(request.headers.get("if-none-match", ""))
+    if "*" in client_etags or etag in client_etags:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        data, media_type = await thumbnail_store.read(digest, width)
+    except ThumbnailFetchError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return Response(content=data, media_type=media_type, headers=headers)
@@ -30,6 +30,7 @@ async def create_db_and_tables():
     async with engine.begin() as conn:
         from models.user import User
         from models.book import Book
+        from models.work import Work
         from models.request import BookRequest
         from models.token import TokenTable
         from models.chat import ChatRoom, ChatMessage
@@ -37,4 +38,6 @@ async def create_db_and_tables():
         # Trust system models
         from models.rating import UserRating, TrustBadge
         from models.transaction import Transaction
+        # Trigram operators/index support for fuzzy title matching
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
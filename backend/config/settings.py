@@ -12,15 +12,82 @@ class Settings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Stateless mode: trust signed access tokens and check revocations in memory
+    AUTH_STATELESS_TOKENS: bool = os.getenv("AUTH_STATELESS_TOKENS", "false").lower() == "true"
+    REVOCATION_SYNC_SECONDS: int = int(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+    # Cap on revoked jtis held in memory; past it the soonest-expiring are dropped first
+    REVOCATION_LIST_MAX_ENTRIES: int = int(os.getenv("REVOCATION_LIST_MAX_ENTRIES", "100000"))
     
     # External API Configuration
     GOOGLE_BOOKS_API_KEY: str = os.getenv("GOOGLE_BOOKS_API_KEY")
     GOOGLE_BOOKS_URL: str = os.getenv("GOOGLE_BOOKS_URL", "https://www.googleapis.com/books/v1/volumes")
+    # Google Books result cache (in-memory LRU in front of a local SQLite file)
+    GOOGLE_BOOKS_CACHE_PATH: str = os.getenv("GOOGLE_BOOKS_CACHE_PATH", "cache/google_books.sqlite3")
+    GOOGLE_BOOKS_CACHE_TTL_SECONDS: int = int(os.getenv("GOOGLE_BOOKS_CACHE_TTL_SECONDS", "86400"))
+    # Queries Google had no match for are remembered for a shorter time
+    GOOGLE_BOOKS_NEGATIVE_TTL_SECONDS: int = int(os.getenv("GOOGLE_BOOKS_NEGATIVE_TTL_SECONDS", "3600"))
+    GOOGLE_BOOKS_CACHE_MEMORY_ENTRIES: int = int(os.getenv("GOOGLE_BOOKS_CACHE_MEMORY_ENTRIES", "1000"))
+    GOOGLE_BOOKS_CACHE_DISK_ENTRIES: int = int(os.getenv("GOOGLE_BOOKS_CACHE_DISK_ENTRIES", "50000"))
+    # Expired results kept this much longer, served while refreshing or while Google Books is down
+    GOOGLE_BOOKS_CACHE_STALE_SECONDS: int = int(os.getenv("GOOGLE_BOOKS_CACHE_STALE_SECONDS", "604800"))
+    # Upper bound on how long a caller waits for a Google Books lookup
+    GOOGLE_BOOKS_DEADLINE_SECONDS: float = float(os.getenv("GOOGLE_BOOKS_DEADLINE_SECONDS", "3"))
+    # Circuit breaker: open at this failure rate over the window (once min calls seen)
+    GOOGLE_BOOKS_BREAKER_FAILURE_RATE: float = float(os.getenv("GOOGLE_BOOKS_BREAKER_FAILURE_RATE", "0.5"))
+    GOOGLE_BOOKS_BREAKER_MIN_CALLS: int = int(os.getenv("GOOGLE_BOOKS_BREAKER_MIN_CALLS", "10"))
+    GOOGLE_BOOKS_BREAKER_WINDOW_SECONDS: float = float(os.getenv("GOOGLE_BOOKS_BREAKER_WINDOW_SECONDS", "60"))
+    GOOGLE_BOOKS_BREAKER_OPEN_SECONDS: float = float(os.getenv("GOOGLE_BOOKS_BREAKER_OPEN_SECONDS", "30"))
+    GOOGLE_BOOKS_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("GOOGLE_BOOKS_BREAKER_HALF_OPEN_CALLS", "1"))
+
+    # Shared outbound HTTP client
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT", "3"))
+    HTTP_CLIENT_READ_TIMEOUT: float = float(os.getenv("HTTP_CLIENT_READ_TIMEOUT", "10"))
+    HTTP_CLIENT_MAX_CONNECTIONS: int = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "50"))
+    HTTP_CLIENT_MAX_KEEPALIVE: int = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", "60"))
+    HTTP_CLIENT_HTTP2: bool = os.getenv("HTTP_CLIENT_HTTP2", "false").lower() == "true"
+
+    # Background thumbnail enrichment
+    THUMBNAIL_ENRICH_CONCURRENCY: int = int(os.getenv("THUMBNAIL_ENRICH_CONCURRENCY", "4"))
+    THUMBNAIL_ENRICH_BATCH_SIZE: int = int(os.getenv("THUMBNAIL_ENRICH_BATCH_SIZE", "50"))
+    THUMBNAIL_ENRICH_FLUSH_SECONDS: float = float(os.getenv("THUMBNAIL_ENRICH_FLUSH_SECONDS", "2"))
+    THUMBNAIL_ENRICH_QUEUE_SIZE: int = int(os.getenv("THUMBNAIL_ENRICH_QUEUE_SIZE", "10000"))
+
+    # Cover proxy (/thumbnails): content-addressed disk cache and resized variants
+    THUMBNAIL_CACHE_PATH: str = os.getenv("THUMBNAIL_CACHE_PATH", "cache/thumbnails")
+    THUMBNAIL_CACHE_MAX_BYTES: int = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    THUMBNAIL_MAX_SOURCE_BYTES: int = int(os.getenv("THUMBNAIL_MAX_SOURCE_BYTES", str(2 * 1024 * 1024)))
+    # Source URL -> content hash entries kept in memory (the rest are read back from disk)
+    THUMBNAIL_URL_CACHE_MAX_ENTRIES: int = int(os.getenv("THUMBNAIL_URL_CACHE_MAX_ENTRIES", "10000"))
+    # Comma-separated variant widths in pixels, all built when a cover is first fetched
+    THUMBNAIL_VARIANT_WIDTHS: str = os.getenv("THUMBNAIL_VARIANT_WIDTHS", "64,128,256")
+    THUMBNAIL_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("THUMBNAIL_CACHE_MAX_AGE_SECONDS", "86400"))
+
+    # Owner search (pg_trgm word similarity between the query and book titles, 0-1)
+    OWNER_SEARCH_SIMILARITY_THRESHOLD: float = float(os.getenv("OWNER_SEARCH_SIMILARITY_THRESHOLD", "0.5"))
+    # Page size cap when a `limit` is given; without one every matching owner is returned
+    OWNER_SEARCH_MAX_RESULTS: int = int(os.getenv("OWNER_SEARCH_MAX_RESULTS", "50"))
+
+    # Page size cap for keyset-paginated book listings (requests without `limit` get every book)
+    BOOK_LIST_MAX_LIMIT: int = int(os.getenv("BOOK_LIST_MAX_LIMIT", "500"))
+
+    # Bulk book import (POST /books/import)
+    BOOK_IMPORT_MAX_ROWS: int = int(os.getenv("BOOK_IMPORT_MAX_ROWS", "5000"))
+    BOOK_IMPORT_MAX_BYTES: int = int(os.getenv("BOOK_IMPORT_MAX_BYTES", "2000000"))
+    BOOK_IMPORT_BATCH_SIZE: int = int(os.getenv("BOOK_IMPORT_BATCH_SIZE", "1000"))
+
+    # In-memory city -> title availability index for /books/search
+    CITY_TITLE_INDEX_ENABLED: bool = os.getenv("CITY_TITLE_INDEX_ENABLED", "true").lower() == "true"
+    # Full rebuilds also pick up books written by other workers; 0 builds once at startup
+    CITY_TITLE_INDEX_REBUILD_SECONDS: int = int(os.getenv("CITY_TITLE_INDEX_REBUILD_SECONDS", "600"))
     
     # Environment Configuration
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     PORT: int = int(os.getenv("PORT", "8000"))
     HOST: str = os.getenv("HOST", "0.0.0.0")
+    # Proxies whose X-Forwarded-For uvicorn trusts (comma-separated IPs/CIDRs); the client
+    # IP is the right-most address not in this list. Render's proxy connects from 10.0.0.0/8
+    FORWARDED_ALLOW_IPS: str = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
     
     # CORS Configuration
     ALLOWED_ORIGINS: str = os.getenv(
@@ -39,6 +106,35 @@ class Settings(BaseSettings):
     # Password Reset Configuration
     RESET_CODE_EXPIRE_MINUTES: int = int(os.getenv("RESET_CODE_EXPIRE_MINUTES", "15"))
 
+    # Auth Principal Cache Configuration
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+    # Password Hashing Configuration
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    # bcrypt cost, pinned so every instance agrees; scripts/calibrate_bcrypt.py recommends
+    # a value for the budget. Never below PASSWORD_HASH_MIN_ROUNDS, the security floor
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+    PASSWORD_HASH_BUDGET_MS: int = int(os.getenv("PASSWORD_HASH_BUDGET_MS", "250"))
+    PASSWORD_HASH_MIN_ROUNDS: int = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", "12"))
+    PASSWORD_HASH_MAX_ROUNDS: int = int(os.getenv("PASSWORD_HASH_MAX_ROUNDS", "15"))
+
+    # Token Reaper Configuration
+    TOKEN_REAPER_INTERVAL_SECONDS: int = int(os.getenv("TOKEN_REAPER_INTERVAL_SECONDS", "300"))
+    TOKEN_REAPER_BATCH_SIZE: int = int(os.getenv("TOKEN_REAPER_BATCH_SIZE", "1000"))
+    TOKEN_REAPER_MAX_BATCHES: int = int(os.getenv("TOKEN_REAPER_MAX_BATCHES", "50"))
+
+    # Rate Limiting Configuration
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # Comma-separated "path=requests/seconds" token-bucket policies
+    RATE_LIMIT_POLICIES: str = os.getenv(
+        "RATE_LIMIT_POLICIES",
+        "/api/v1/login=10/60,/api/v1/forgot-password=3/300,/api/v1/books/search=30/60,/api/v1/books/import=5/300"
+    )
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_MAX_IN_FLIGHT: int = int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", "100"))
+
     class Config:
         env_file = "config/.env.production" if os.getenv("ENVIRONMENT") == "production" else "config/.env"
         case_sensitive = True
@@ -52,4 +148,21 @@ class Settings(BaseSettings):
             # Allow all origins in development
             return ["*"]
 
+    @property
+    def rate_limit_policies(self) -> dict[str, tuple[int, float]]:
+        """Convert RATE_LIMIT_POLICIES string to {path: (capacity, period_seconds)}"""
+        policies = {}
+        for entry in self.RATE_LIMIT_POLICIES.split(","):
+            if not entry.strip():
+                continue
+            path, limit = entry.strip().split("=")
+            capacity, period = limit.split("/")
+            policies[path.strip().rstrip("/")] = (int(capacity), float(period))
+        return policies
+
+    @property
+    def thumbnail_variant_widths(self) -> tuple[int, ...]:
+        """Convert THUMBNAIL_VARIANT_WIDTHS string to sorted widths"""
+        return tuple(sorted({int(width) for width in self.THUMBNAIL_VARIANT_WIDTHS.split(",") if width.strip()}))
+
 settings = Settings()
@@ -6,8 +6,22 @@ from fastapi.responses import JSONResponse
 from api.auth import router as auth_router
 from api.books import router as books_router
 from api.chat import router as chat_router
+from api.thumbnails import router as thumbnails_router
 from config.database import create_db_and_tables
 from config.settings import settings
+from utils.principal_cache import principal_cache
+from utils.password_hasher import password_hasher
+from utils.token_reaper import token_reaper
+from utils.revocation_list import revocation_list
+from utils.auth_utils import configure_password_hashing
+from utils.rate_limiter import rate_limiter, RateLimitMiddleware
+from utils.google_books_cache import google_books_cache
+from utils.http_client import http_client
+from utils.google_books import google_books_flight, google_books_breaker
+from utils.thumbnail_enricher import thumbnail_enricher
+from utils.city_title_index import city_title_index
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.thumbnail_store import thumbnail_store
 
 app = FastAPI(
     title="BookSwap API", 
@@ -17,6 +31,11 @@ app = FastAPI(
     redoc_url="/redoc" if settings.ENVIRONMENT == "development" else None
 )
 
+# Rate limiting / load shedding for expensive routes. Registered before CORS so
+# CORS stays outermost and 429/503 responses still carry its headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,11 +44,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 @app.on_event("startup")
 async def on_startup():
     await create_db_and_tables()
+    await configure_password_hashing()
+    http_client.start()
+    thumbnail_enricher.start()
+    token_reaper.start()
+    if settings.CITY_TITLE_INDEX_ENABLED:
+        city_title_index.start()
+    if settings.AUTH_STATELESS_TOKENS:
+        await revocation_list.load()
+        revocation_list.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await thumbnail_enricher.stop()
+    await token_reaper.stop()
+    await city_title_index.stop()
+    await revocation_list.stop()
+    password_hasher.shutdown()
+    google_books_cache.close()
+    await http_client.close()
 
 # Health check endpoint
 @app.get("/health")
@@ -41,6 +80,25 @@ async def health_check():
         "version": "1.0"
     }
 
+# Metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """In-process cache and worker counters for monitoring"""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "token_reaper": token_reaper.stats(),
+        "revocation_list": revocation_list.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "google_books_cache": google_books_cache.stats(),
+        "http_client": http_client.stats(),
+        "google_books_single_flight": google_books_flight.stats(),
+        "google_books_breaker": google_books_breaker.stats(),
+        "thumbnail_enricher": thumbnail_enricher.stats(),
+        "city_title_index": city_title_index.stats(),
+        "thumbnail_store": thumbnail_store.stats()
+    }
+
 # Root endpoint
 @app.get("/")
 def root():
@@ -55,6 +113,7 @@ def root():
 app.include_router(auth_router, prefix="/api/v1", tags=["auth"])
 app.include_router(books_router, prefix="/api/v1", tags=["books"])
 app.include_router(chat_router, prefix="/api/v1", tags=["chat"])
+app.include_router(thumbnails_router, prefix="/api/v1", tags=["thumbnails"])
 
 # Trust & Safety System routers
 from api.trust import router as trust_router
@@ -1,7 +1,7 @@
 # models/book.py
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from config.database import Base
 from datetime import datetime
@@ -12,11 +12,26 @@ class Book(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     author = Column(String)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    # Canonical work this copy belongs to; its thumbnail is copied here once enriched
+    work_id = Column(UUID(as_uuid=True), ForeignKey("works.id"), nullable=True, index=True)
     owner_username = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     thumbnail = Column(String, nullable=True)  # Fixed: proper SQLAlchemy column definition
+    # Full-text document over title and author, maintained by Postgres (never loaded into the ORM)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(author, ''))", persisted=True)
+    ))
     
     # Relationships
     owner = relationship("User", back_populates="books")
+    work = relationship("Work", back_populates="books")
     transactions = relationship("Transaction", back_populates="book", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Keyset pagination of an owner's books, newest first
+        Index("ix_books_owner_created", "owner_id", "created_at", "id"),
+        # Local catalog full-text search
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+    )
@@ -1,5 +1,5 @@
 # models/token.py
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -13,10 +13,19 @@ class TokenTable(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     access_token = Column(String, nullable=False)
     refresh_token = Column(String, nullable=True)  # Add refresh token
-    access_token_expires = Column(DateTime, nullable=True)  # Track access token expiry
-    refresh_token_expires = Column(DateTime, nullable=True)  # Track refresh token expiry
+    access_token_digest = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 hex of access_token
+    refresh_token_digest = Column(String(64), unique=True, index=True, nullable=True)  # SHA-256 hex of refresh_token
+    access_token_expires = Column(DateTime, nullable=True, index=True)  # Track access token expiry
+    refresh_token_expires = Column(DateTime, nullable=True, index=True)  # Track refresh token expiry
+    access_token_jti = Column(String(32), nullable=True)  # jti claim of access_token, for stateless revocation
     status = Column(Boolean, default=True)
+    revoked_at = Column(DateTime, nullable=True, index=True)  # Set when status flips to False
     created_date = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
     user = relationship("User", back_populates="tokens")
+
+    # Lets the token reaper and revocation list find revoked rows without scanning live ones
+    __table_args__ = (
+        Index("ix_tokens_revoked", "access_token_expires", postgresql_where=text("status = false")),
+    )
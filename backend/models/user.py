@@ -7,14 +7,22 @@ import uuid
 from config.database import Base
 from datetime import datetime
 
+def normalize_username(username: str) -> str:
+    """Case-folded form used for all username lookups"""
+    return username.lower()
+
+def _default_username_normalized(context):
+    return normalize_username(context.get_current_parameters()["username"])
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username = Column(String, unique=True, nullable=False)
+    username_normalized = Column(String, unique=True, index=True, nullable=False, default=_default_username_normalized)
     email = Column(String, unique=True, nullable=True)  # Made nullable for existing users
     password_hash = Column(String, nullable=False)
-    city = Column(String, nullable=True)
+    city = Column(String, nullable=True, index=True)
     avatar_seed = Column(String, nullable=True)  # Store avatar seed for dicebear
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -0,0 +1,44 @@
+# models/work.py
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from typing import Optional
+import uuid
+from config.database import Base
+from datetime import datetime
+
+def normalize_work_text(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a title or author"""
+    return " ".join((value or "").split()).casefold()
+
+def make_work_key(title: Optional[str], author: Optional[str], isbn: Optional[str] = None) -> str:
+    """Canonical key: the ISBN when known, otherwise normalized title + author"""
+    if isbn:
+        return f"isbn:{isbn}"
+    return f"ta:{normalize_work_text(title)}|{normalize_work_text(author)}"
+
+class Work(Base):
+    """
+    Canonical catalog entry shared by every owned copy of the same book, so
+    metadata (thumbnail) is looked up and stored once per work instead of
+    once per Book row.
+    """
+    __tablename__ = "works"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    work_key = Column(String, unique=True, index=True, nullable=False)
+    isbn = Column(String(13), nullable=True)
+    title = Column(String, nullable=False)
+    title_key = Column(String, nullable=False, index=True)  # normalize_work_text(title)
+    author = Column(String, nullable=True)
+    thumbnail = Column(String, nullable=True)
+    enriched_at = Column(DateTime, nullable=True)  # last Google Books lookup, found or not
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    books = relationship("Book", back_populates="work")
+
+    __table_args__ = (
+        # Typo-tolerant owner search (pg_trgm) over distinct works rather than every copy
+        Index("ix_works_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
@@ -2,7 +2,7 @@
 from pydantic import UUID4
 from uuid import UUID
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class BookBase(BaseModel):
@@ -10,7 +10,7 @@ class BookBase(BaseModel):
     author: Optional[str] = None
 
 class BookCreate(BookBase):
-    pass
+    isbn: Optional[str] = None  # ISBN-10/13; identifies the work when given
 
 class BookUpdate(BaseModel):
     title: Optional[str] = None
@@ -26,3 +26,24 @@ class BookOut(BookBase):
     class Config:
         from_attributes = True
         json_encoders = {UUID: str}
+
+class LocalBookResult(BookOut):
+    owner_city: Optional[str] = None
+    rank: float
+
+class LocalBookSearchPage(BaseModel):
+    items: List[LocalBookResult]
+    next_cursor: Optional[str] = None  # pass back as `cursor` to get the next page
+
+class BookImportRowResult(BaseModel):
+    row: int  # 1-based position in the uploaded list / CSV data rows
+    status: str  # "created" or "invalid"
+    title: Optional[str] = None  # None for ISBN-only rows until the background lookup names them
+    book_id: Optional[UUID4] = None
+    error: Optional[str] = None
+
+class BookImportReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: List[BookImportRowResult]
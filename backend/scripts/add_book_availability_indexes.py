@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the indexes behind the city availability query in /books/search
+"""
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+async def add_availability_indexes():
+    """Index users.city and books.owner_id if missing"""
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_city ON users (city)"))
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_books_owner_id ON books (owner_id)"))
+            print("✅ Availability indexes present")
+
+    except Exception as e:
+        print(f"❌ Error adding availability indexes: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    print("🔄 Starting availability index migration...")
+    asyncio.run(add_availability_indexes())
+    print("✅ Migration completed!")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the index behind keyset pagination of GET /books/
+"""
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+async def add_owner_created_index():
+    """Index books on (owner_id, created_at, id) if missing"""
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_books_owner_created
+                ON books (owner_id, created_at, id)
+            """))
+            print("✅ Owner listing index present")
+
+    except Exception as e:
+        print(f"❌ Error adding owner listing index: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    print("🔄 Starting book listing index migration...")
+    asyncio.run(add_owner_created_index())
+    print("✅ Migration completed!")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the full-text search column and GIN index to books table
+"""
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+async def add_search_vector():
+    """Add a generated tsvector over title/author plus its GIN index if missing"""
+    try:
+        async with engine.begin() as conn:
+            result = await conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'books' AND column_name = 'search_vector'
+            """))
+
+            if result.fetchone() is None:
+                print("Adding search_vector column to books table (rewrites the table)...")
+                await conn.execute(text("""
+                    ALTER TABLE books
+                    ADD COLUMN search_vector TSVECTOR
+                    GENERATED ALWAYS AS (
+                        to_tsvector('english', coalesce(title, '') || ' ' || coalesce(author, ''))
+                    ) STORED
+                """))
+                print("✅ Successfully added search_vector column")
+            else:
+                print("✅ search_vector column already exists in books table")
+
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_books_search_vector
+                ON books USING gin (search_vector)
+            """))
+            print("✅ GIN index on search_vector present")
+
+    except Exception as e:
+        print(f"❌ Error adding search_vector: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    print("🔄 Starting book search vector migration...")
+    asyncio.run(add_search_vector())
+    print("✅ Migration completed!")
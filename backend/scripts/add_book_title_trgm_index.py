@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration script to enable pg_trgm and add the trigram index behind /books/search-owners
+"""
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+async def add_title_trgm_index():
+    """Enable pg_trgm and build a GIN trigram index on books.title if missing"""
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            print("✅ pg_trgm extension enabled")
+
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_books_title_trgm
+                ON books USING gin (title gin_trgm_ops)
+            """))
+            print("✅ Trigram index on books.title present")
+
+    except Exception as e:
+        print(f"❌ Error adding trigram index: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    print("🔄 Starting title trigram index migration...")
+    asyncio.run(add_title_trgm_index())
+    print("✅ Migration completed!")
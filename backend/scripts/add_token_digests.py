@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Migration script to add indexed SHA-256 token digest columns to tokens table
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+BATCH_SIZE = 5000
+
+async def run_migration():
+    """Run the database migration"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Starting token digest migration...")
+
+            await conn.execute(text("ALTER TABLE tokens ADD COLUMN IF NOT EXISTS access_token_digest VARCHAR(64)"))
+            await conn.execute(text("ALTER TABLE tokens ADD COLUMN IF NOT EXISTS refresh_token_digest VARCHAR(64)"))
+            print("✅ Digest columns present")
+
+        # Backfill in bounded batches so a large tokens table is not locked in one statement
+        total = 0
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(text("""
+                    UPDATE tokens
+                    SET access_token_digest = encode(sha256(convert_to(access_token, 'UTF8')), 'hex'),
+                        refresh_token_digest = CASE
+                            WHEN refresh_token IS NULL THEN NULL
+                            ELSE encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex')
+                        END
+                    WHERE id IN (
+                        SELECT id FROM tokens
+                        WHERE access_token_digest IS NULL
+                        LIMIT :batch_size
+                    )
+                """), {"batch_size": BATCH_SIZE})
+
+            if result.rowcount == 0:
+                break
+            total += result.rowcount
+            print(f"🔄 Backfilled {total} token rows...")
+
+        print(f"✅ Backfilled {total} token rows")
+
+        async with engine.begin() as conn:
+            # Identical JWTs (same subject and expiry second) could be stored twice
+            # before tokens carried a jti; keep only the newest copy of each.
+            # Ranking within each digest is one sort, not a self-join, and rows
+            # without a created_date count as the oldest instead of being skipped.
+            removed = 0
+            for column in ("access_token_digest", "refresh_token_digest"):
+                result = await conn.execute(text(f"""
+                    DELETE FROM tokens
+                    WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY {column}
+                                ORDER BY created_date DESC NULLS LAST, id DESC
+                            ) AS copy_rank
+                            FROM tokens
+                            WHERE {column} IS NOT NULL
+                        ) ranked
+                        WHERE copy_rank > 1
+                    )
+                """))
+                removed += result.rowcount
+            print(f"🔄 Removed {removed} duplicate token rows")
+
+            await conn.execute(text("ALTER TABLE tokens ALTER COLUMN access_token_digest SET NOT NULL"))
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_tokens_access_token_digest
+                ON tokens (access_token_digest)
+            """))
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_tokens_refresh_token_digest
+                ON tokens (refresh_token_digest)
+            """))
+            print("✅ Unique digest indexes created")
+
+            print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+async def rollback_migration():
+    """Rollback the migration (for development purposes)"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Rolling back token digest migration...")
+
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_access_token_digest"))
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_refresh_token_digest"))
+            await conn.execute(text("ALTER TABLE tokens DROP COLUMN IF EXISTS access_token_digest"))
+            await conn.execute(text("ALTER TABLE tokens DROP COLUMN IF EXISTS refresh_token_digest"))
+
+            print("✅ Rollback completed!")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database migration for token digests")
+    parser.add_argument("--rollback", action="store_true", help="Rollback the migration")
+    args = parser.parse_args()
+
+    if args.rollback:
+        print("⚠️  WARNING: This will remove token digest columns!")
+        confirm = input("Are you sure you want to rollback? (yes/no): ")
+        if confirm.lower() == 'yes':
+            asyncio.run(rollback_migration())
+        else:
+            print("Rollback cancelled.")
+    else:
+        asyncio.run(run_migration())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the expiry/revocation indexes used by the token reaper
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+
+async def run_migration():
+    """Run the database migration"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Starting token expiry index migration...")
+
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_tokens_access_token_expires
+                ON tokens (access_token_expires)
+            """))
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_tokens_refresh_token_expires
+                ON tokens (refresh_token_expires)
+            """))
+            await conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_tokens_revoked
+                ON tokens (access_token_expires) WHERE status = false
+            """))
+
+            print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+async def rollback_migration():
+    """Rollback the migration (for development purposes)"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Rolling back token expiry index migration...")
+
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_access_token_expires"))
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_refresh_token_expires"))
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_revoked"))
+
+            print("✅ Rollback completed!")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database migration for token expiry indexes")
+    parser.add_argument("--rollback", action="store_true", help="Rollback the migration")
+    args = parser.parse_args()
+
+    if args.rollback:
+        asyncio.run(rollback_migration())
+    else:
+        asyncio.run(run_migration())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Migration script to add jti/revoked_at columns used by stateless auth mode
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jose import jwt
+from sqlalchemy import text
+from config.database import engine
+
+async def run_migration():
+    """Run the database migration"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Starting token revocation migration...")
+
+            await conn.execute(text("ALTER TABLE tokens ADD COLUMN IF NOT EXISTS access_token_jti VARCHAR(32)"))
+            await conn.execute(text("ALTER TABLE tokens ADD COLUMN IF NOT EXISTS revoked_at TIMESTAMP WITHOUT TIME ZONE"))
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_tokens_revoked_at ON tokens (revoked_at)"))
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_revoked"))
+            await conn.execute(text("""
+                CREATE INDEX ix_tokens_revoked
+                ON tokens (access_token_expires) WHERE status = false
+            """))
+            print("✅ Columns and indexes present")
+
+            # Existing revocations have no timestamp; stamp them so incremental syncs see them
+            result = await conn.execute(text("""
+                UPDATE tokens SET revoked_at = now() AT TIME ZONE 'utc'
+                WHERE status = false AND revoked_at IS NULL
+            """))
+            print(f"🔄 Stamped {result.rowcount} revoked rows")
+
+            # Only revoked, unexpired rows matter to the revocation list,
+            # so only those need their jti extracted from the stored JWT
+            result = await conn.execute(text("""
+                SELECT id, access_token FROM tokens
+                WHERE status = false
+                  AND access_token_jti IS NULL
+                  AND access_token_expires > now() AT TIME ZONE 'utc'
+            """))
+            backfilled = 0
+            for token_id, access_token in result.all():
+                jti = jwt.get_unverified_claims(access_token).get("jti")
+                if jti:
+                    await conn.execute(
+                        text("UPDATE tokens SET access_token_jti = :jti WHERE id = :id"),
+                        {"jti": jti, "id": token_id}
+                    )
+                    backfilled += 1
+            print(f"🔄 Backfilled jti for {backfilled} revoked rows")
+
+            print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+async def rollback_migration():
+    """Rollback the migration (for development purposes)"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Rolling back token revocation migration...")
+
+            await conn.execute(text("DROP INDEX IF EXISTS ix_tokens_revoked_at"))
+            await conn.execute(text("ALTER TABLE tokens DROP COLUMN IF EXISTS access_token_jti"))
+            await conn.execute(text("ALTER TABLE tokens DROP COLUMN IF EXISTS revoked_at"))
+
+            print("✅ Rollback completed!")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database migration for stateless token revocation")
+    parser.add_argument("--rollback", action="store_true", help="Rollback the migration")
+    args = parser.parse_args()
+
+    if args.rollback:
+        asyncio.run(rollback_migration())
+    else:
+        asyncio.run(run_migration())
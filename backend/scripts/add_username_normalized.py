@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Migration script to add an indexed lowercase username column to users table
+
+Run with --explain to print the query plans of the old ILIKE lookup and the
+new normalized lookup against the current database.
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from config.database import engine
+from models.user import normalize_username
+
+async def run_migration():
+    """Run the database migration"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Starting normalized username migration...")
+
+            await conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS username_normalized VARCHAR"))
+
+            # Normalize in Python with the same function the app looks users up
+            # with; Postgres lower() depends on the database's ctype and can
+            # disagree on non-ASCII usernames
+            result = await conn.execute(text("SELECT id, username, username_normalized FROM users"))
+            updates = [
+                {"user_id": user_id, "normalized": normalize_username(username)}
+                for user_id, username, normalized in result.all()
+                if normalized != normalize_username(username)
+            ]
+            if updates:
+                await conn.execute(
+                    text("UPDATE users SET username_normalized = :normalized WHERE id = :user_id"),
+                    updates
+                )
+            print(f"🔄 Backfilled {len(updates)} users")
+
+            # Usernames that only differ by case cannot share a unique normalized value
+            result = await conn.execute(text("""
+                SELECT username_normalized, array_agg(username)
+                FROM users
+                GROUP BY username_normalized
+                HAVING count(*) > 1
+            """))
+            collisions = result.all()
+            if collisions:
+                for normalized, usernames in collisions:
+                    print(f"❌ Case-insensitive collision on '{normalized}': {usernames}")
+                raise RuntimeError("Resolve the username collisions above, then re-run the migration")
+
+            await conn.execute(text("ALTER TABLE users ALTER COLUMN username_normalized SET NOT NULL"))
+            await conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_users_username_normalized
+                ON users (username_normalized)
+            """))
+            print("✅ Unique index on username_normalized created")
+
+            print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+async def explain_lookups(username: str):
+    """Print EXPLAIN ANALYZE for the old and new username lookups"""
+
+    try:
+        async with engine.connect() as conn:
+            for label, query in (
+                ("before: username ILIKE", "SELECT * FROM users WHERE username ILIKE :username"),
+                ("after: username_normalized =", "SELECT * FROM users WHERE username_normalized = :normalized"),
+            ):
+                result = await conn.execute(
+                    text(f"EXPLAIN ANALYZE {query}"),
+                    {"username": username, "normalized": normalize_username(username)}
+                )
+                print(f"📊 {label}")
+                for (line,) in result.all():
+                    print(f"    {line}")
+    finally:
+        await engine.dispose()
+
+async def rollback_migration():
+    """Rollback the migration (for development purposes)"""
+
+    try:
+        async with engine.begin() as conn:
+            print("🔄 Rolling back normalized username migration...")
+
+            await conn.execute(text("DROP INDEX IF EXISTS ix_users_username_normalized"))
+            await conn.execute(text("ALTER TABLE users DROP COLUMN IF EXISTS username_normalized"))
+
+            print("✅ Rollback completed!")
+
+    except Exception as e:
+        print(f"❌ Rollback failed: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Database migration for normalized usernames")
+    parser.add_argument("--rollback", action="store_true", help="Rollback the migration")
+    parser.add_argument("--explain", metavar="USERNAME", help="Show lookup plans for USERNAME instead of migrating")
+    args = parser.parse_args()
+
+    if args.rollback:
+        asyncio.run(rollback_migration())
+    elif args.explain:
+        asyncio.run(explain_lookups(args.explain))
+    else:
+        asyncio.run(run_migration())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the canonical works table, point books at it and
+backfill work_id for existing books.
+
+Safe to re-run: the backfill only touches books whose work_id is still null.
+"""
+import asyncio
+import sys
+import os
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, select, text, update
+from config.database import AsyncSessionLocal, engine
+from models.book import Book
+from models.user import User  # noqa: F401  (registers the users table for the books foreign key)
+from models.work import Work, make_work_key
+from utils.works import ensure_works
+
+async def add_works_table():
+    """Create works, add books.work_id and its index if missing"""
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(lambda sync_conn: Work.__table__.create(sync_conn, checkfirst=True))
+        print("✅ works table present")
+
+        await conn.execute(text("ALTER TABLE books ADD COLUMN IF NOT EXISTS work_id UUID REFERENCES works(id)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_books_work_id ON books (work_id)"))
+        print("✅ books.work_id column and index present")
+
+        # Owner search now matches titles on works; the per-copy trigram index is unused
+        await conn.execute(text("DROP INDEX IF EXISTS ix_books_title_trgm"))
+        # ...and so is lower(title): city availability reads works.title_key instead
+        await conn.execute(text("DROP INDEX IF EXISTS ix_books_title_lower"))
+
+async def backfill_work_ids(batch_size: int):
+    """Assign every book without a work to one, a batch at a time"""
+    books = Book.__table__
+    assign = (
+        update(books)
+        .where(books.c.id == bindparam("book_id"))
+        .values(work_id=bindparam("new_work_id"))
+    )
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Book.id, Book.title, Book.author, Book.thumbnail)
+                .where(Book.work_id.is_(None))
+                .order_by(Book.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            works = await ensure_works(db, ((row.title, row.author, None, row.thumbnail or None) for row in rows))
+            await db.execute(assign, [
+                {"book_id": row.id, "new_work_id": works[make_work_key(row.title, row.author)].id}
+                for row in rows
+            ])
+            await db.commit()
+
+        total += len(rows)
+        print(f"🔄 Linked {total} books to works")
+
+    # Copies without a cover pick up their work's thumbnail
+    async with engine.begin() as conn:
+        result = await conn.execute(text("""
+            UPDATE books SET thumbnail = works.thumbnail
+            FROM works
+            WHERE books.work_id = works.id
+              AND (books.thumbnail IS NULL OR books.thumbnail = '')
+              AND works.thumbnail IS NOT NULL
+        """))
+        print(f"✅ Filled {result.rowcount} missing thumbnails from works")
+
+async def main(batch_size: int):
+    try:
+        await add_works_table()
+        await backfill_work_ids(batch_size)
+    except Exception as e:
+        print(f"❌ Error migrating to works: {str(e)}")
+        raise
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Add the works table and backfill books.work_id")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Books linked per transaction")
+    args = parser.parse_args()
+
+    print("🔄 Starting works migration...")
+    asyncio.run(main(args.batch_size))
+    print("✅ Migration completed!")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Resumable bulk backfill of missing thumbnails, and of the titles of books
+imported by ISBN alone (still titled by their ISBN), from Google Books.
+
+Walks the works table with keyset pagination on id, looks each work up once
+(by ISBN when it has one) with bounded parallelism and a requests-per-second
+budget, and writes the results the same way the background enricher does:
+placeholder titles renamed, works.thumbnail and enriched_at set, then the
+thumbnail copied to every book of the work. This is also the durable retry
+path for lookups the enricher lost (failed, queue full or restarted). A
+checkpoint is recorded after every fully processed page; a page with failed
+lookups is retried after a back-off (waiting out an open Google Books
+circuit) and never skipped, so an interrupted run picks up where it stopped.
+"""
+import asyncio
+import json
+import sys
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, or_, select
+from config.database import AsyncSessionLocal, engine
+from models.work import Work
+from utils.google_books import google_books_breaker, search_google_books
+from utils.google_books_cache import google_books_cache
+from utils.http_client import http_client
+from utils.thumbnail_enricher import THUMBNAIL_LOOKUP_RESULTS, resolved_title_row, write_enrichment, write_resolved_titles
+
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".backfill_thumbnails.json")
+
+
+class RequestPacer:
+    """Spaces out calls so they never exceed requests_per_second"""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def load_checkpoint(path: str) -> dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        # Checkpoints from the per-book version hold a book id; start over on works
+        if "started_at" in checkpoint:
+            return checkpoint
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "last_id": None, "scanned": 0, "updated_works": 0, "updated_books": 0, "renamed_books": 0,
+        "not_found": 0, "failed": 0,
+    }
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)  # atomic, so a crash never leaves a half-written checkpoint
+
+
+async def wait_for_breaker():
+    """Sleep while the Google Books circuit is open instead of burning lookups on 503s"""
+    delay = google_books_breaker.retry_after()
+    while delay > 0:
+        print(f"⏸️  Google Books circuit open; waiting {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = google_books_breaker.retry_after()
+
+
+async def lookup(title: str, isbn: Optional[str], pacer: RequestPacer, semaphore: asyncio.Semaphore):
+    """Best Google Books match for a work (by ISBN when known), or None"""
+    async with semaphore:
+        await wait_for_breaker()
+        await pacer.wait()
+        if isbn:
+            google_books = await search_google_books(isbn, max_results=1, field="isbn")
+        else:
+            google_books = await search_google_books(title, max_results=THUMBNAIL_LOOKUP_RESULTS)
+        return google_books[0] if google_books else None
+
+
+async def backfill(page_size: int, concurrency: int, requests_per_second: float, checkpoint_path: str, max_page_retries: int):
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint["last_id"]:
+        print(f"🔄 Resuming after work {checkpoint['last_id']} ({checkpoint['scanned']} already scanned)")
+
+    pacer = RequestPacer(requests_per_second)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Works looked up during this run (found or not) drop out of the scan, so
+    # retrying a page only repeats its failed lookups
+    started_at = datetime.fromisoformat(checkpoint["started_at"])
+    retries = 0
+
+    while True:
+        conditions = [
+            or_(
+                Work.thumbnail.is_(None),
+                Work.thumbnail == "",
+                and_(Work.isbn.isnot(None), Work.title == Work.isbn),  # still titled by its ISBN
+            ),
+            or_(Work.enriched_at.is_(None), Work.enriched_at < started_at),
+        ]
+        if checkpoint["last_id"]:
+            conditions.append(Work.id > uuid.UUID(checkpoint["last_id"]))
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Work.id, Work.title, Work.isbn)
+                .where(*conditions)
+                .order_by(Work.id)
+                .limit(page_size)
+            )
+            rows = result.all()
+
+        if not rows:
+            break
+
+        lookups = await asyncio.gather(
+            *(lookup(title, isbn, pacer, semaphore) for _, title, isbn in rows),
+            return_exceptions=True
+        )
+
+        batch = []
+        titles = []
+        failed = 0
+        now = datetime.utcnow()
+        for (work_id, title, isbn), match in zip(rows, lookups):
+            if isinstance(match, Exception):
+                failed += 1
+                continue
+            if match and isbn and title == isbn:
+                titles.append(resolved_title_row(work_id, isbn, match))
+            thumbnail_url = (match.get("thumbnail") if match else None) or None
+            if thumbnail_url:
+                checkpoint["updated_works"] += 1
+            else:
+                checkpoint["not_found"] += 1
+            batch.append({"target_work_id": work_id, "new_thumbnail": thumbnail_url, "enriched_at": now})
+
+        if batch:
+            async with AsyncSessionLocal() as db:
+                # Titles first, as in the enricher's flush
+                if titles:
+                    checkpoint["renamed_books"] = checkpoint.get("renamed_books", 0) + await write_resolved_titles(db, titles)
+                checkpoint["updated_books"] += await write_enrichment(db, batch)
+                await db.commit()
+        checkpoint["scanned"] += len(batch)
+
+        if failed:
+            # Keep last_id where it is so the failed works are retried, not skipped
+            checkpoint["failed"] += failed
+            save_checkpoint(checkpoint_path, checkpoint)
+            retries += 1
+            if retries > max_page_retries:
+                print(f"⚠️  {failed} lookups still failing after {max_page_retries} retries; stopping (re-run to resume)")
+                return checkpoint
+            delay = max(google_books_breaker.retry_after(), min(60, 2 ** retries))
+            print(f"⚠️  {failed} lookups failed; retrying page in {delay:.0f}s ({retries}/{max_page_retries})")
+            await asyncio.sleep(delay)
+            continue
+
+        retries = 0
+        checkpoint["last_id"] = str(rows[-1][0])
+        save_checkpoint(checkpoint_path, checkpoint)
+        print(
+            f"📊 scanned {checkpoint['scanned']} | works updated {checkpoint['updated_works']} | "
+            f"books updated {checkpoint['updated_books']} | books renamed {checkpoint.get('renamed_books', 0)} | not found {checkpoint['not_found']} | failed {checkpoint['failed']}"
+        )
+
+    return checkpoint
+
+
+async def main(args):
+    try:
+        checkpoint = await backfill(args.page_size, args.concurrency, args.rps, args.checkpoint, args.max_page_retries)
+        print(
+            f"✅ Backfill finished: {checkpoint['updated_works']} works and {checkpoint['updated_books']} books updated, "
+            f"{checkpoint.get('renamed_books', 0)} books renamed from their ISBN"
+        )
+    finally:
+        await http_client.close()
+        google_books_cache.close()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill missing book thumbnails and ISBN-only titles from Google Books")
+    parser.add_argument("--page-size", type=int, default=500, help="Works fetched per keyset page")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel Google Books lookups")
+    parser.add_argument("--rps", type=float, default=5.0, help="Google Books requests-per-second budget")
+    parser.add_argument("--max-page-retries", type=int, default=5, help="Retries of a page with failed lookups before stopping")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    parser.add_argument("--reset", action="store_true", help="Ignore any checkpoint and start from the beginning")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    print("🚀 Thumbnail backfill")
+    print("=" * 50)
+    asyncio.run(main(args))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: local catalog search on a large synthetic catalog, comparing the
+old ILIKE '%term%' scan with the tsvector/GIN query behind /books/local-search.
+
+Seeds synthetic users and books into the database in DATABASE_URL (run the
+search vector migration first), times both queries, then deletes every
+synthetic row.
+"""
+import asyncio
+import random
+import statistics
+import sys
+import os
+import time
+import uuid
+from datetime import datetime
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert, text
+from config.database import AsyncSessionLocal, engine
+from models.book import Book
+from models.user import User
+
+PREFIX = "bench_search_"
+CITY = "bench-city"
+WORDS = [
+    "shadow", "river", "empire", "garden", "winter", "secret", "silent", "crown", "ocean", "iron",
+    "midnight", "forest", "glass", "storm", "hollow", "golden", "last", "lost", "wild", "fire",
+    "kingdom", "stone", "letters", "memory", "stranger", "harbor", "summer", "bridge", "raven", "light",
+]
+AUTHORS = ["Ada Marsh", "Leo Hart", "Mina Cole", "Ravi Shah", "Nora Quist", "Omar Vale", "Iris Penn"]
+SEARCH_TERMS = ["midnight garden", "iron crown", "raven", "silent ocean", "golden bridge"]
+
+
+async def seed(users: int, books: int, batch_size: int = 5000):
+    user_rows = [
+        {
+            "id": uuid.uuid4(),
+            "username": f"{PREFIX}{i}",
+            "username_normalized": f"{PREFIX}{i}",
+            "password_hash": "x",
+            "city": CITY,
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(users)
+    ]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User), user_rows)
+        await db.commit()
+
+        for start in range(0, books, batch_size):
+            rows = []
+            for _ in range(min(batch_size, books - start)):
+                owner = random.choice(user_rows)
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "title": " ".join(random.sample(WORDS, random.randint(2, 4))).title(),
+                    "author": random.choice(AUTHORS),
+                    "owner_id": owner["id"],
+                    "owner_username": owner["username"],
+                    "created_at": datetime.utcnow(),
+                })
+            await db.execute(insert(Book), rows)
+            await db.commit()
+            print(f"🔄 Seeded {start + len(rows)} books")
+
+        await db.execute(text("ANALYZE books"))
+        await db.commit()
+
+
+async def time_query(sql: str, params: dict, repeats: int):
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            await db.execute(text(sql), params)
+            timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+async def run(repeats: int):
+    ilike_sql = """
+        SELECT books.id FROM books JOIN users ON users.id = books.owner_id
+        WHERE books.title ILIKE :pattern AND users.city = :city
+        ORDER BY books.id LIMIT 20
+    """
+    fts_sql = """
+        SELECT books.id, ts_rank(books.search_vector, query) AS rank
+        FROM books JOIN users ON users.id = books.owner_id,
+             websearch_to_tsquery('english', :term) AS query
+        WHERE books.search_vector @@ query AND users.city = :city
+        ORDER BY rank DESC, books.id LIMIT 20
+    """
+    for term in SEARCH_TERMS:
+        ilike = await time_query(ilike_sql, {"pattern": f"%{term}%", "city": CITY}, repeats)
+        fts = await time_query(fts_sql, {"term": term, "city": CITY}, repeats)
+        print(
+            f"📊 {term:16s} | ILIKE p50 {ilike[0]:8.2f} ms max {ilike[1]:8.2f} ms | "
+            f"tsvector p50 {fts[0]:8.2f} ms max {fts[1]:8.2f} ms"
+        )
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Book).where(Book.owner_username.like(f"{PREFIX}%")))
+        await db.execute(delete(User).where(User.username.like(f"{PREFIX}%")))
+        await db.commit()
+
+
+async def main(users: int, books: int, repeats: int):
+    try:
+        await seed(users, books)
+        await run(repeats)
+    finally:
+        await cleanup()
+        await engine.dispose()
+        print("🧹 Synthetic catalog removed")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark local catalog full-text search")
+    parser.add_argument("--users", type=int, default=2000, help="Synthetic owners")
+    parser.add_argument("--books", type=int, default=500000, help="Synthetic books")
+    parser.add_argument("--repeats", type=int, default=20, help="Runs per query")
+    args = parser.parse_args()
+
+    print("🚀 Local search benchmark")
+    print("=" * 50)
+    asyncio.run(main(args.users, args.books, args.repeats))
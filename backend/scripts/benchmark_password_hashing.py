@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of an unrelated endpoint while a burst of logins is hashing.
+
+Compares calling passlib bcrypt inline on the event loop against the bounded
+PasswordHasher pool. Runs fully in-process (no database, no network).
+"""
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from utils.auth_utils import pwd_context
+from utils.password_hasher import PasswordHasher
+
+STORED_HASH = pwd_context.hash("password123")
+PING_INTERVAL_SECONDS = 0.01
+
+
+def build_app(hasher: PasswordHasher) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/login-inline")
+    async def login_inline():
+        return {"ok": pwd_context.verify("password123", STORED_HASH)}
+
+    @app.post("/login-pooled")
+    async def login_pooled():
+        return {"ok": await hasher.run(pwd_context.verify, "password123", STORED_HASH)}
+
+    return app
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client: httpx.AsyncClient, login_path: str, logins: int, pings: int):
+    latencies = []
+
+    async def pinger():
+        # Pings are scheduled on a fixed cadence and measured from their intended
+        # send time, so time spent stuck behind a blocked loop is counted.
+        for i in range(pings):
+            intended = started + i * PING_INTERVAL_SECONDS
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await client.get("/ping")
+            latencies.append((time.perf_counter() - intended) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(pinger(), *(client.post(login_path) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "elapsed": elapsed,
+    }
+
+
+async def main(logins: int, pings: int, workers: int):
+    hasher = PasswordHasher(max_workers=workers, max_pending=0)
+    transport = httpx.ASGITransport(app=build_app(hasher))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for label, path in (("inline bcrypt", "/login-inline"), ("pooled bcrypt", "/login-pooled")):
+            result = await run_scenario(client, path, logins, pings)
+            print(
+                f"📊 {label:14s} | /ping p50 {result['p50']:7.2f} ms | p99 {result['p99']:7.2f} ms | "
+                f"max {result['max']:7.2f} ms | burst of {logins} logins took {result['elapsed']:.2f}s"
+            )
+
+    print(f"📈 Pool stats: {hasher.stats()}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt on vs off the event loop")
+    parser.add_argument("--logins", type=int, default=50, help="Concurrent logins in the burst")
+    parser.add_argument("--pings", type=int, default=200, help="Unrelated requests measured during the burst")
+    parser.add_argument("--workers", type=int, default=4, help="Hashing pool size")
+    args = parser.parse_args()
+
+    print("🚀 Password hashing benchmark")
+    print("=" * 50)
+    asyncio.run(main(args.logins, args.pings, args.workers))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: signup throughput of the old check-then-insert flow versus the
+single-transaction, constraint-driven flow used by /signup.
+
+Runs against the database in DATABASE_URL. bcrypt is excluded (one
+precomputed hash is reused) so the numbers reflect DB round trips only.
+All rows created by the benchmark are deleted afterwards.
+"""
+import asyncio
+import sys
+import os
+import time
+import uuid
+from datetime import datetime
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+from config.database import AsyncSessionLocal, engine
+from models.user import User
+from models.token import TokenTable
+from utils.auth_utils import pwd_context, create_access_token, create_refresh_token, token_digest, get_token_jti
+
+PREFIX = "bench_signup_"
+PASSWORD_HASH = pwd_context.hash("password123")
+
+
+def build_token(user_id, username):
+    access_token, access_expires = create_access_token(data={"sub": username})
+    refresh_token, refresh_expires = create_refresh_token(data={"sub": username})
+    return TokenTable(
+        user_id=user_id,
+        access_token=access_token,
+        refresh_token=refresh_token,
+        access_token_digest=token_digest(access_token),
+        refresh_token_digest=token_digest(refresh_token),
+        access_token_jti=get_token_jti(access_token),
+        access_token_expires=access_expires,
+        refresh_token_expires=refresh_expires,
+        status=True
+    )
+
+
+async def legacy_signup(username: str):
+    """Two existence SELECTs, commit user, refresh, commit token"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        if result.scalars().first():
+            return False
+        result = await db.execute(select(User).where(User.email == f"{username}@bench.local"))
+        if result.scalars().first():
+            return False
+
+        db_user = User(username=username, email=f"{username}@bench.local", password_hash=PASSWORD_HASH)
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+
+        db.add(build_token(db_user.id, username))
+        await db.commit()
+        return True
+
+
+async def single_transaction_signup(username: str):
+    """User and token rows in one transaction, conflicts mapped from the constraint"""
+    async with AsyncSessionLocal() as db:
+        db_user = User(
+            id=uuid.uuid4(),
+            username=username,
+            email=f"{username}@bench.local",
+            password_hash=PASSWORD_HASH,
+            created_at=datetime.utcnow()
+        )
+        db.add_all([db_user, build_token(db_user.id, username)])
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        return True
+
+
+async def run(label: str, signup, count: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    run_id = uuid.uuid4().hex[:8]
+
+    async def one(i: int):
+        async with semaphore:
+            return await signup(f"{PREFIX}{run_id}_{i}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - started
+    print(f"📊 {label:20s} | {sum(results)} signups in {elapsed:.2f}s | {count / elapsed:8.1f} signups/s")
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as db:
+        bench_users = select(User.id).where(User.username.like(f"{PREFIX}%"))
+        await db.execute(delete(TokenTable).where(TokenTable.user_id.in_(bench_users)))
+        await db.execute(delete(User).where(User.username.like(f"{PREFIX}%")))
+        await db.commit()
+
+
+async def main(count: int, concurrency: int):
+    try:
+        await run("legacy (5 trips)", legacy_signup, count, concurrency)
+        await run("single transaction", single_transaction_signup, count, concurrency)
+    finally:
+        await cleanup()
+        await engine.dispose()
+        print("🧹 Benchmark rows removed")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark signup DB round trips")
+    parser.add_argument("--count", type=int, default=200, help="Signups per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent signups")
+    args = parser.parse_args()
+
+    print("🚀 Signup throughput benchmark")
+    print("=" * 50)
+    asyncio.run(main(args.count, args.concurrency))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Measure bcrypt hash time on this host and recommend PASSWORD_HASH_ROUNDS
+for a latency budget. Pin the result in the environment when running
+several instances so they all agree on one cost.
+"""
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import settings
+from utils.password_hasher import calibrate_bcrypt_rounds
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Calibrate bcrypt rounds to a latency budget")
+    parser.add_argument("--budget-ms", type=float, default=settings.PASSWORD_HASH_BUDGET_MS, help="Target hash time in ms")
+    parser.add_argument("--min-rounds", type=int, default=settings.PASSWORD_HASH_MIN_ROUNDS, help="Security floor")
+    parser.add_argument("--max-rounds", type=int, default=settings.PASSWORD_HASH_MAX_ROUNDS, help="Upper bound")
+    args = parser.parse_args()
+
+    print("🔐 bcrypt calibration")
+    print("=" * 50)
+    rounds, estimates = calibrate_bcrypt_rounds(args.budget_ms, args.min_rounds, args.max_rounds)
+    for cost, estimate in estimates.items():
+        marker = "  ← recommended" if cost == rounds else ""
+        print(f"📊 rounds={cost:2d}  ~{estimate:8.1f} ms{marker}")
+    print("=" * 50)
+    print(f"✅ PASSWORD_HASH_ROUNDS={rounds}")
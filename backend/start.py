@@ -17,6 +17,8 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=False,  # Disable reload in production
+        proxy_headers=True,  # Client IP from the trusted proxy's X-Forwarded-For (rate limiting keys on it)
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
         access_log=True,
         log_level="info" if settings.ENVIRONMENT == "production" else "debug"
     )
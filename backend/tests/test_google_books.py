@@ -0,0 +1,53 @@
+"""
+Google Books query keys: queries that Google answers differently must not
+share a cache entry.
+"""
+import asyncio
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from utils import google_books
+from utils.google_books import normalize_query, search_google_books
+from utils.google_books_cache import GoogleBooksCache
+
+
+@pytest.mark.parametrize("first, second", [
+    ("C++ Primer", "C Primer"),
+    ("C# in Depth", "C in Depth"),
+])
+def test_symbols_stay_in_the_key(first, second):
+    assert normalize_query(first) != normalize_query(second)
+
+
+def test_case_width_and_whitespace_fold():
+    assert normalize_query("  Harry   POTTER ") == normalize_query("harry potter")
+    assert normalize_query("Ｃ＋＋ Primer") == normalize_query("c++ primer")
+
+
+def test_colliding_pair_gets_its_own_results(monkeypatch, tmp_path):
+    cache = GoogleBooksCache(path=str(tmp_path / "cache.sqlite3"), ttl_seconds=60, memory_entries=10, disk_entries=10)
+    sent = []
+
+    async def fake_fetch(query, max_results=10, field="intitle"):
+        sent.append(f"{field}:{query}")
+        return [{"title": query}]
+
+    monkeypatch.setattr(google_books, "google_books_cache", cache)
+    monkeypatch.setattr(google_books, "fetch_google_books", fake_fetch)
+
+    async def run():
+        return await search_google_books("C++ Primer"), await search_google_books("C Primer")
+
+    try:
+        plus, plain = asyncio.run(run())
+    finally:
+        cache.close()
+
+    assert sent == ["intitle:C++ Primer", "intitle:C Primer"]
+    assert plus == [{"title": "C++ Primer"}]
+    assert plain == [{"title": "C Primer"}]
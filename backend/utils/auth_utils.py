@@ -1,4 +1,6 @@
 # utils/auth_utils.py
+import hashlib
+import uuid
 from datetime import datetime, timedelta,timezone
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
@@ -10,17 +12,40 @@ from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.database import get_db
 from sqlalchemy import select
-from models.user import User
+from models.user import User, normalize_username
+from utils.principal_cache import principal_cache
+from utils.password_hasher import password_hasher
+from utils.revocation_list import revocation_list
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 oauth2_scheme = HTTPBearer()
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash uses a lower bcrypt cost than the configured one"""
+    return pwd_context.needs_update(hashed_password)
+
+async def configure_password_hashing():
+    """Fix the bcrypt cost for this process from the pinned PASSWORD_HASH_ROUNDS"""
+    rounds = settings.PASSWORD_HASH_ROUNDS
+    if rounds < settings.PASSWORD_HASH_MIN_ROUNDS:
+        raise ValueError(
+            f"PASSWORD_HASH_ROUNDS={rounds} is below the floor of {settings.PASSWORD_HASH_MIN_ROUNDS}"
+        )
+
+    # Only a min bound: cheaper hashes get upgraded on login, costlier ones are left alone
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    password_hasher.rounds = rounds
+
+def token_digest(token: str) -> str:
+    """SHA-256 hex digest of a raw token, used as a fixed-size lookup key"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -29,7 +54,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM), expire
 
 def create_refresh_token(data: dict, expires_delta: timedelta = None):
@@ -39,7 +64,7 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM), expire
 # def decode_token(token: str):
 #     try:
@@ -52,7 +77,8 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None):
 #         return username
 #     except JWTError:
 #         raise HTTPException(401, "Invalid token or expired")
-def decode_token(token: str):
+def decode_token_payload(token: str) -> dict:
+    """Verify signature and expiry and return the full claims"""
     try:
         print("🔍 SECRET_KEY:", settings.SECRET_KEY)
         print("🔍 ALGORITHM:", settings.ALGORITHM)
@@ -67,11 +93,18 @@ def decode_token(token: str):
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(401, "Invalid token: missing subject")
-        return username
+        return payload
     except JWTError as e:
         print("❌ JWT Error:", str(e))  # ← This will show the real issue
         raise HTTPException(401, "Invalid token or expired")
 
+def decode_token(token: str):
+    return decode_token_payload(token)["sub"]
+
+def get_token_jti(token: str):
+    """Read the jti claim of a token we just issued (no signature check)"""
+    return jwt.get_unverified_claims(token).get("jti")
+
 def verify_refresh_token(token: str):
     """Verify refresh token and return payload"""
     try:
@@ -115,20 +148,39 @@ async def get_current_user(
     from models.token import TokenTable
     
     print("the token is ",token)
-    username = decode_token(token.credentials)  # returns username
+    payload = decode_token_payload(token.credentials)
+    username = payload["sub"]
     print("the user namae is ", username)
     
+    # Stateless mode trusts the signed access token and only checks its jti
+    # against the in-memory revocation list; legacy tokens without a jti
+    # still go through the tokens table
+    jti = payload.get("jti")
+    stateless = settings.AUTH_STATELESS_TOKENS and jti is not None and payload.get("type") == "access"
+    if stateless and revocation_list.is_revoked(jti):
+        raise HTTPException(401, "Token is invalid or has been revoked")
+    
+    # Serve the principal from the in-process cache when possible
+    token_key = token_digest(token.credentials)
+    cached_user = principal_cache.get(token_key)
+    if cached_user is not None:
+        return await db.merge(cached_user, load=False)
+    
     # Get user
-    result = await db.execute(select(User).where(User.username.ilike(username)))
+    result = await db.execute(select(User).where(User.username_normalized == normalize_username(username)))
     user = result.scalars().first()
     if not user:
         raise HTTPException(404, "User not found")
     
+    if stateless:
+        principal_cache.put(token_key, user, datetime.utcfromtimestamp(payload["exp"]))
+        return user
+    
     # Check if token is valid in database
     token_result = await db.execute(
         select(TokenTable).filter(
+            TokenTable.access_token_digest == token_key,
             TokenTable.user_id == user.id,
-            TokenTable.access_token == token.credentials,
             TokenTable.status == True
         )
     )
@@ -136,6 +188,7 @@ async def get_current_user(
     if not token_record:
         raise HTTPException(401, "Token is invalid or has been revoked")
     
+    principal_cache.put(token_key, user, token_record.access_token_expires)
     return user  # Return full user object
 
 # async def get_current_user(token: str = Depends(oauth2_scheme)):
@@ -0,0 +1,92 @@
+# utils/book_import.py
+import csv
+import io
+import json
+import re
+from typing import Iterator, Optional, Tuple
+from fastapi import HTTPException, Request
+
+MAX_TITLE_LENGTH = 500
+MAX_AUTHOR_LENGTH = 300
+_ISBN_SEPARATORS = re.compile(r"[\s-]")
+
+
+async def read_import_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body, refusing anything larger than max_bytes without buffering it all"""
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(413, f"Import body exceeds {max_bytes} bytes")
+    return bytes(body)
+
+
+def iter_import_rows(content_type: str, body: bytes) -> Iterator[dict]:
+    """
+    Yield raw rows from a CSV (header row with title/author/isbn columns) or
+    JSON (a list, or {"books": [...]}, of objects or bare title strings) body.
+    CSV rows are produced lazily as the reader walks the text.
+    """
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(400, "Import body must be UTF-8")
+
+    if "csv" in content_type:
+        reader = csv.reader(io.StringIO(text))
+        try:
+            header = next(reader, None)
+            if not header:
+                return
+            columns = [name.strip().lower() for name in header]
+            for values in reader:
+                if any(value.strip() for value in values):
+                    yield dict(zip(columns, values))
+        except csv.Error as e:
+            raise HTTPException(400, f"Malformed CSV at line {reader.line_num}: {str(e)}")
+        return
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise HTTPException(400, "Import body must be a JSON list of books or a CSV file")
+    if isinstance(data, dict):
+        data = data.get("books")
+    if not isinstance(data, list):
+        raise HTTPException(400, "Expected a JSON list of books (or {\"books\": [...]})")
+    for item in data:
+        yield {"title": item} if isinstance(item, str) else item
+
+
+def normalize_isbn(value: str) -> Optional[str]:
+    """Digits-only ISBN-10/13 (trailing X allowed on ISBN-10), or None if malformed"""
+    isbn = _ISBN_SEPARATORS.sub("", value).upper()
+    if len(isbn) == 13 and isbn.isdigit():
+        return isbn
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == "X"):
+        return isbn
+    return None
+
+
+def validate_import_row(raw) -> Tuple[Optional[dict], Optional[str]]:
+    """Return ({"title", "author", "isbn"}, None) for a usable row, or (None, error)"""
+    if not isinstance(raw, dict):
+        return None, "Row must be an object with title, author and/or isbn"
+
+    def field(name: str) -> str:
+        value = raw.get(name)
+        return value.strip() if isinstance(value, str) else ""
+
+    title, author, isbn_value = field("title"), field("author"), field("isbn")
+    isbn = None
+    if isbn_value:
+        isbn = normalize_isbn(isbn_value)
+        if isbn is None:
+            return None, f"Invalid ISBN '{isbn_value}'"
+    if not title and not isbn:
+        return None, "Either title or isbn is required"
+    if len(title) > MAX_TITLE_LENGTH:
+        return None, f"Title longer than {MAX_TITLE_LENGTH} characters"
+    if len(author) > MAX_AUTHOR_LENGTH:
+        return None, f"Author longer than {MAX_AUTHOR_LENGTH} characters"
+    return {"title": title or None, "author": author or None, "isbn": isbn}, None
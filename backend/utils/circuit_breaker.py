@@ -0,0 +1,109 @@
+# utils/circuit_breaker.py
+import time
+from collections import deque
+from typing import Optional
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for an outbound dependency.
+
+    closed:    calls flow; outcomes within the last window_seconds are tracked
+               and once at least min_calls have been seen with a failure rate
+               of failure_rate_threshold or more, the breaker opens.
+    open:      calls are refused for open_seconds.
+    half_open: up to half_open_calls probe calls are let through; a success
+               closes the breaker, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_rate_threshold: float, min_calls: int,
+                 window_seconds: float, open_seconds: float, half_open_calls: int = 1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = self.CLOSED
+        self._outcomes: deque = deque()  # (monotonic time, succeeded)
+        self._opened_at: Optional[float] = None
+        self._probes = 0
+        self.opened = 0
+        self.rejected = 0
+        self.successes = 0
+        self.failures = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; half-open admits a limited number of probes"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probes = 0
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker admits probes again (0 when calls may be tried now)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        self.successes += 1
+        if self.state == self.HALF_OPEN:
+            self._close()
+            return
+        self._record(True)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        if self.state == self.CLOSED and len(self._outcomes) >= self.min_calls and self.failure_rate() >= self.failure_rate_threshold:
+            self._open()
+
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, succeeded in self._outcomes if not succeeded) / len(self._outcomes)
+
+    def _record(self, succeeded: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, succeeded))
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        print(f"⚠️  Circuit '{self.name}' opened; failing fast for {self.open_seconds}s")
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._opened_at = None
+        self._outcomes.clear()
+        print(f"✅ Circuit '{self.name}' closed")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 4),
+            "window_calls": len(self._outcomes),
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
@@ -0,0 +1,182 @@
+# utils/city_title_index.py
+import asyncio
+import sys
+import time
+from typing import Optional
+from sqlalchemy import select
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.book import Book
+from models.user import User
+from models.work import normalize_work_text
+
+
+def title_key(title: str) -> str:
+    """Case- and whitespace-insensitive title key, the same form as Work.title_key"""
+    return normalize_work_text(title)
+
+
+class CityTitleIndex:
+    """
+    In-process index of city -> title key -> {owner: copies}, answering
+    "is this title available in my city and from how many owners" with
+    dictionary lookups instead of a query per search.
+
+    Built with a streaming query at startup and rebuilt periodically (which
+    also picks up books written by other workers); this process's book
+    writes are applied incrementally in between. Until the first build
+    finishes `ready` is False and callers should fall back to the database.
+    """
+
+    def __init__(self, rebuild_interval_seconds: int, batch_size: int = 5000):
+        self.rebuild_interval_seconds = rebuild_interval_seconds
+        self.batch_size = batch_size
+        self._index: dict = {}  # city -> {title key -> {owner id (int) -> copies}}
+        self._journal: Optional[list] = None  # writes made while a rebuild is streaming
+        self._rebuild_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.books = 0
+        self.lookups = 0
+        self.rebuilds = 0
+        self.last_rebuild_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @staticmethod
+    def _apply(index: dict, city: str, owner_id, title: str, delta: int) -> int:
+        titles = index.setdefault(city, {})
+        key = title_key(title)
+        owners = titles.setdefault(key, {})
+        owner = owner_id.int  # UUID as int: smaller, and asyncpg/uuid.UUID instances compare alike
+        copies = owners.get(owner, 0) + delta
+        if copies > 0:
+            owners[owner] = copies
+            return delta
+        # Removing a book the index never saw (e.g. mid-rebuild) must not go negative
+        applied = -owners.pop(owner, 0)
+        if not owners:
+            del titles[key]
+            if not titles:
+                del index[city]
+        return applied
+
+    def _write(self, city: Optional[str], owner_id, title: Optional[str], delta: int):
+        if not city or not title:
+            return
+        if self._journal is not None:
+            self._journal.append((city, owner_id, title, delta))
+        self.books += self._apply(self._index, city, owner_id, title, delta)
+
+    def add(self, city: Optional[str], owner_id, title: Optional[str]):
+        self._write(city, owner_id, title, 1)
+
+    def remove(self, city: Optional[str], owner_id, title: Optional[str]):
+        self._write(city, owner_id, title, -1)
+
+    def rename(self, city: Optional[str], owner_id, old_title: Optional[str], new_title: Optional[str]):
+        if old_title is not None and new_title is not None and title_key(old_title) == title_key(new_title):
+            return
+        self.remove(city, owner_id, old_title)
+        self.add(city, owner_id, new_title)
+
+    def owner_counts(self, city: str, titles, exclude_owner_id=None) -> dict:
+        """{title key: number of owners in city} for the given titles, not counting exclude_owner_id"""
+        self.lookups += 1
+        city_titles = self._index.get(city, {})
+        excluded = exclude_owner_id.int if exclude_owner_id is not None else None
+        counts = {}
+        for title in titles:
+            owners = city_titles.get(title_key(title))
+            if owners:
+                count = len(owners) - (1 if excluded in owners else 0)
+                if count:
+                    counts[title_key(title)] = count
+        return counts
+
+    async def rebuild(self):
+        """Stream every (city, owner, title) row into a fresh index, then swap it in"""
+        async with self._rebuild_lock:
+            started = time.perf_counter()
+            self._journal = []
+            try:
+                index: dict = {}
+                books = 0
+                async with AsyncSessionLocal() as db:
+                    result = await db.stream(
+                        select(User.city, Book.owner_id, Book.title)
+                        .join(User, User.id == Book.owner_id)
+                        .where(User.city.isnot(None))
+                        .execution_options(yield_per=self.batch_size)
+                    )
+                    async for partition in result.partitions():
+                        for city, owner_id, title in partition:
+                            books += self._apply(index, city, owner_id, title, 1)
+
+                # Writes that landed while streaming may or may not be in the
+                # snapshot; replaying them can at worst miscount until the next rebuild
+                for city, owner_id, title, delta in self._journal:
+                    books += self._apply(index, city, owner_id, title, delta)
+
+                self._index = index
+                self.books = books
+                self.ready = True
+                self.rebuilds += 1
+                self.last_error = None
+            finally:
+                self._journal = None
+                self.last_rebuild_seconds = round(time.perf_counter() - started, 3)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ City title index rebuild failed: {str(e)}")
+            if self.rebuild_interval_seconds <= 0:
+                return
+            await asyncio.sleep(self.rebuild_interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint of the index structures (dicts, keys and counts)"""
+        size = sys.getsizeof(self._index)
+        for city, titles in self._index.items():
+            size += sys.getsizeof(city) + sys.getsizeof(titles)
+            for key, owners in titles.items():
+                size += sys.getsizeof(key) + sys.getsizeof(owners)
+                for owner, copies in owners.items():
+                    size += sys.getsizeof(owner) + sys.getsizeof(copies)
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "cities": len(self._index),
+            "titles": sum(len(titles) for titles in self._index.values()),
+            "books": self.books,
+            "memory_bytes": self.memory_bytes(),
+            "lookups": self.lookups,
+            "rebuilds": self.rebuilds,
+            "rebuilding": self._journal is not None,
+            "rebuild_interval_seconds": self.rebuild_interval_seconds,
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+            "last_error": self.last_error,
+        }
+
+
+city_title_index = CityTitleIndex(rebuild_interval_seconds=settings.CITY_TITLE_INDEX_REBUILD_SECONDS)
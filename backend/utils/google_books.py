@@ -1,12 +1,101 @@
 # utils/google_books.py
-import httpx
+import asyncio
+import unicodedata
 from fastapi import HTTPException
 from config.settings import settings
+from utils.google_books_cache import google_books_cache
+from utils.circuit_breaker import CircuitBreaker
+from utils.http_client import http_client
+from utils.single_flight import SingleFlight
 
-async def search_google_books(query: str, max_results: int = 10):
+google_books_flight = SingleFlight("google_books")
+google_books_breaker = CircuitBreaker(
+    "google_books",
+    failure_rate_threshold=settings.GOOGLE_BOOKS_BREAKER_FAILURE_RATE,
+    min_calls=settings.GOOGLE_BOOKS_BREAKER_MIN_CALLS,
+    window_seconds=settings.GOOGLE_BOOKS_BREAKER_WINDOW_SECONDS,
+    open_seconds=settings.GOOGLE_BOOKS_BREAKER_OPEN_SECONDS,
+    half_open_calls=settings.GOOGLE_BOOKS_BREAKER_HALF_OPEN_CALLS,
+)
+_refreshes: set = set()  # background stale-while-revalidate tasks, kept referenced until done
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a search query, used only for the cache and single-flight
+    key: Unicode-normalized (full/half width folded), casefolded and whitespace
+    collapsed, so "Harry  Potter" and "harry potter" share one cache entry.
+    Punctuation and symbols are kept: Google matches on them, so "C++ Primer"
+    and "C Primer" must not answer each other. Never sent upstream.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+async def search_google_books(query: str, max_results: int = 10, field: str = "intitle"):
+    """Search Google Books, serving repeated queries from the two-tier cache.
+    `field` is the volumes search keyword the query is matched on (intitle, isbn, ...)
+
+    Queries that normalize alike share a cache entry; Google is sent the
+    query itself, trimmed and with whitespace collapsed. Expired cache
+    entries are returned immediately while a background refresh runs. When
+    the circuit breaker is open, or a fresh lookup misses its deadline,
+    callers get a 503/504 instead of waiting on Google."""
+    query = " ".join(query.split())
+    key_query = normalize_query(query)
+    if not key_query:
+        return []
+    cache_key = google_books_cache.make_key(key_query if field == "intitle" else f"{field}:{key_query}", max_results)
+
+    cached_books, stale = await google_books_cache.get(cache_key)
+    if cached_books is not None:
+        if stale and google_books_breaker.allow():
+            _refresh_in_background(cache_key, query, max_results, field)
+        return cached_books
+
+    if not google_books_breaker.allow():
+        raise HTTPException(
+            503,
+            "Book search is temporarily unavailable",
+            headers={"Retry-After": str(int(settings.GOOGLE_BOOKS_BREAKER_OPEN_SECONDS))}
+        )
+
+    # Concurrent misses for the same query share one upstream request; the
+    # deadline only stops this caller waiting, the shared lookup still fills the cache
+    try:
+        books = await asyncio.wait_for(
+            google_books_flight.do(cache_key, lambda: _fetch_and_cache(cache_key, query, max_results, field)),
+            timeout=settings.GOOGLE_BOOKS_DEADLINE_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "Book search timed out")
+    # Every caller gets its own dicts since results are annotated in place
+    return [dict(book) for book in books]
+
+def _refresh_in_background(cache_key: str, query: str, max_results: int, field: str):
+    async def refresh():
+        try:
+            await google_books_flight.do(cache_key, lambda: _fetch_and_cache(cache_key, query, max_results, field))
+        except Exception as e:
+            print(f"Background refresh failed for '{query}': {str(e)}")
+
+    task = asyncio.create_task(refresh())
+    _refreshes.add(task)
+    task.add_done_callback(_refreshes.discard)
+
+async def _fetch_and_cache(cache_key: str, query: str, max_results: int, field: str):
+    # The breaker sees each upstream request once, however many callers share it
+    try:
+        books = await fetch_google_books(query, max_results, field)
+    except Exception:
+        google_books_breaker.record_failure()
+        raise
+    google_books_breaker.record_success()
+    # "No match" answers (typos, self-published titles) are cached too, for a shorter time
+    await google_books_cache.put(cache_key, books, ttl_seconds=None if books else settings.GOOGLE_BOOKS_NEGATIVE_TTL_SECONDS)
+    return books
+
+async def fetch_google_books(query: str, max_results: int = 10, field: str = "intitle"):
     # Enhanced search parameters for better relevance
     params = {
-        "q": f"intitle:{query}",
+        "q": f"{field}:{query}",
 
         "key": settings.GOOGLE_BOOKS_API_KEY,
         "maxResults": max_results,
@@ -16,88 +105,90 @@ async def search_google_books(query: str, max_results: int = 10):
         "langRestrict": "en"     # Restrict to English books for better results
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(settings.GOOGLE_BOOKS_URL, params=params)
-            response.raise_for_status()
-            data = response.json()
+    # Reuse the process-wide pooled client (keep-alive, explicit timeouts)
+    client = http_client.get()
+    try:
+        response = await client.get(settings.GOOGLE_BOOKS_URL, params=params)
+        response.raise_for_status()
+        data = response.json()
 
-            books = []
-            for item in data.get("items", []):
-                vol = item["volumeInfo"]
-                book_id = item.get("id",{})
-                sale_info = item.get("saleInfo", {})
-                
-                # Calculate a relevance score based on multiple factors
-                relevance_score = 0
-                
-                # Rating factor (0-5 points)
-                avg_rating = vol.get("averageRating", 0)
-                ratings_count = vol.get("ratingsCount", 0)
-                if avg_rating and ratings_count:
-                    # Weight by both rating and number of ratings
-                    # relevance_score += (avg_rating / 5.0) * min(ratings_count / 100, 5)
-                    relevance_score = avg_rating + ratings_count
-                
-                # Publication recency factor (0-2 points for books published in last 100 years)
-                # pub_date = vol.get("publishedDate", "")
-                # if pub_date:
-                #     try:
-                #         year = int(pub_date.split("-")[0])
-                #         current_year = 2024
-                #         if year >= current_year - 100:
-                #             relevance_score += 2 * (1 - (current_year - year) / 100)
-                #     except:
-                #         pass
-                
-                # Page count factor (0-1 points, prefer substantial books)
-                # page_count = vol.get("pageCount", 0)
-                # if page_count:
-                #     if 100 <= page_count <= 800:  # Sweet spot for most books
-                #         relevance_score += 1
-                #     elif page_count > 50:
-                #         relevance_score += 0.5
-                
-                # Availability factor (0-1 points)
-                if sale_info.get("saleability") in ["FOR_SALE", "FREE"]:
-                    relevance_score += 0.5
-                
-                # Has description factor (0-0.5 points)
-                if vol.get("description"):
-                    relevance_score += 1
-                
-                # Has thumbnail factor (0-0.5 points)
-                if vol.get("imageLinks", {}).get("thumbnail"):
-                    relevance_score += 1
+        books = []
+        for item in data.get("items", []):
+            vol = item["volumeInfo"]
+            book_id = item.get("id",{})
+            sale_info = item.get("saleInfo", {})
+            
+            # Calculate a relevance score based on multiple factors
+            relevance_score = 0
+            
+            # Rating factor (0-5 points)
+            avg_rating = vol.get("averageRating", 0)
+            ratings_count = vol.get("ratingsCount", 0)
+            if avg_rating and ratings_count:
+                # Weight by both rating and number of ratings
+                # relevance_score += (avg_rating / 5.0) * min(ratings_count / 100, 5)
+                relevance_score = avg_rating + ratings_count
+            
+            # Publication recency factor (0-2 points for books published in last 100 years)
+            # pub_date = vol.get("publishedDate", "")
+            # if pub_date:
+            #     try:
+            #         year = int(pub_date.split("-")[0])
+            #         current_year = 2024
+            #         if year >= current_year - 100:
+            #             relevance_score += 2 * (1 - (current_year - year) / 100)
+            #     except:
+            #         pass
+            
+            # Page count factor (0-1 points, prefer substantial books)
+            # page_count = vol.get("pageCount", 0)
+            # if page_count:
+            #     if 100 <= page_count <= 800:  # Sweet spot for most books
+            #         relevance_score += 1
+            #     elif page_count > 50:
+            #         relevance_score += 0.5
+            
+            # Availability factor (0-1 points)
+            if sale_info.get("saleability") in ["FOR_SALE", "FREE"]:
+                relevance_score += 0.5
+            
+            # Has description factor (0-0.5 points)
+            if vol.get("description"):
+                relevance_score += 1
+            
+            # Has thumbnail factor (0-0.5 points)
+            if vol.get("imageLinks", {}).get("thumbnail"):
+                relevance_score += 1
 
-                # Extract thumbnail URL with debugging
-                thumbnail_url = vol.get("imageLinks", {}).get("smallThumbnail", "")
-                print(f"DEBUG - Book: {vol.get('title', 'Unknown')}")
-                print(f"DEBUG - ImageLinks: {vol.get('imageLinks', {})}")
-                print(f"DEBUG - Thumbnail URL: {thumbnail_url}")
-                
-                book_data = {
-                    "title": vol.get("title", "Unknown"),
-                    "author": ", ".join(vol.get("authors", ["Unknown"])),
-                    "publisher": vol.get("publisher", "Unknown"),
-                    "published_date": vol.get("publishedDate", "Unknown"),
-                    "description": vol.get("description", ""),
-                    "thumbnail": thumbnail_url,
-                    "isbn": next((id['identifier'] for id in vol.get("industryIdentifiers", []) 
-                                if id['type'] in ['ISBN_10', 'ISBN_13']), None),
-                    "average_rating": avg_rating,
-                    "ratings_count": ratings_count,
-                    # "page_count": page_count,
-                    "categories": vol.get("categories", []),
-                    "book_id": book_id,
-                    "relevance_score": relevance_score
-                }
-                
-                books.append(book_data)
+            # Extract thumbnail URL with debugging
+            thumbnail_url = vol.get("imageLinks", {}).get("smallThumbnail", "")
+            print(f"DEBUG - Book: {vol.get('title', 'Unknown')}")
+            print(f"DEBUG - ImageLinks: {vol.get('imageLinks', {})}")
+            print(f"DEBUG - Thumbnail URL: {thumbnail_url}")
             
-            # Sort by relevance score (highest first)
-            books.sort(key=lambda x: x["relevance_score"], reverse=True)
+            book_data = {
+                "title": vol.get("title", "Unknown"),
+                "author": ", ".join(vol.get("authors", ["Unknown"])),
+                "publisher": vol.get("publisher", "Unknown"),
+                "published_date": vol.get("publishedDate", "Unknown"),
+                "description": vol.get("description", ""),
+                "thumbnail": thumbnail_url,
+                "isbn": next((id['identifier'] for id in vol.get("industryIdentifiers", []) 
+                            if id['type'] in ['ISBN_10', 'ISBN_13']), None),
+                "average_rating": avg_rating,
+                "ratings_count": ratings_count,
+                # "page_count": page_count,
+                "categories": vol.get("categories", []),
+                "book_id": book_id,
+                "relevance_score": relevance_score
+            }
             
-            return books
-        except Exception as e:
-            raise HTTPException(500, f"Search failed: {str(e)}")
+            books.append(book_data)
+        
+        # Sort by relevance score (highest first)
+        books.sort(key=lambda x: x["relevance_score"], reverse=True)
+        
+        return books
+    except Exception as e:
+        http_client.errors += 1
+        raise HTTPException(500, f"Search failed: {str(e)}")
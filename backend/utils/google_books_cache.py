@@ -0,0 +1,195 @@
+# utils/google_books_cache.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from config.settings import settings
+
+
+class GoogleBooksCache:
+    """
+    Two-tier TTL cache for parsed Google Books results: an in-memory LRU in
+    front of a local SQLite file that survives restarts. Keys are built from
+    the normalized query and max_results; values are the parsed book lists
+    (an empty list records that Google had no match).
+    Expired entries are kept for a further stale_seconds and returned flagged
+    as stale, so they can still be served while Google Books is failing or
+    the entry is being refreshed.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, memory_entries: int, disk_entries: int, stale_seconds: int = 0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: OrderedDict = OrderedDict()  # key -> (expires_at, books)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._puts_since_trim = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        return f"{max_results}|{query}"
+
+    async def get(self, key: str) -> Tuple[Optional[list], bool]:
+        """
+        Return (copy of the cached books, stale). Entries past their TTL but
+        within the stale grace come back with stale=True; (None, False) on miss.
+        """
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, books = entry
+            if now < expires_at + self.stale_seconds:
+                self._memory.move_to_end(key)
+                self._count_hit(now < expires_at, memory=True, books=books)
+                return self._copy(books), now >= expires_at
+            del self._memory[key]
+
+        row = await self._disk_call(self._disk_get, key, now)
+        if row is not None:
+            expires_at, books = row
+            self._remember(key, expires_at, books)
+            self._count_hit(now < expires_at, memory=False, books=books)
+            return self._copy(books), now >= expires_at
+
+        self.misses += 1
+        return None, False
+
+    def _count_hit(self, fresh: bool, memory: bool, books: list):
+        if not books:
+            self.negative_hits += 1
+        if not fresh:
+            self.stale_hits += 1
+        elif memory:
+            self.memory_hits += 1
+        else:
+            self.disk_hits += 1
+
+    async def put(self, key: str, books: list, ttl_seconds: Optional[int] = None):
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        books = self._copy(books)
+        self._remember(key, expires_at, books)
+        await self._disk_call(self._disk_put, key, expires_at, books)
+
+    def _remember(self, key: str, expires_at: float, books: list):
+        self._memory[key] = (expires_at, books)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _copy(books: list) -> list:
+        # Callers annotate result dicts in place (e.g. availability), so never hand out cached objects
+        return [dict(book) for book in books]
+
+    async def _disk_call(self, func, *args):
+        if self.disk_entries <= 0:
+            return None
+        try:
+            return await asyncio.to_thread(func, *args)
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"❌ Google Books disk cache error: {str(e)}")
+            return None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS google_books_cache (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    books TEXT NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_google_books_cache_accessed_at ON google_books_cache (accessed_at)")
+        return self._db
+
+    def _disk_get(self, key: str, now: float):
+        with self._db_lock:
+            db = self._connection()
+            row = db.execute(
+                "SELECT expires_at, books FROM google_books_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] + self.stale_seconds <= now:
+                db.execute("DELETE FROM google_books_cache WHERE key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("UPDATE google_books_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            db.commit()
+            return row[0], json.loads(row[1])
+
+    def _disk_put(self, key: str, expires_at: float, books: list):
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO google_books_cache (key, expires_at, accessed_at, books) VALUES (?, ?, ?, ?)",
+                (key, expires_at, time.time(), json.dumps(books))
+            )
+            self._puts_since_trim += 1
+            if self._puts_since_trim >= 100:
+                self._trim(db)
+            db.commit()
+
+    def _trim(self, db: sqlite3.Connection):
+        """Drop rows past their stale grace, then least recently used rows beyond disk_entries"""
+        self._puts_since_trim = 0
+        db.execute("DELETE FROM google_books_cache WHERE expires_at <= ?", (time.time() - self.stale_seconds,))
+        db.execute("""
+            DELETE FROM google_books_cache WHERE key IN (
+                SELECT key FROM google_books_cache
+                ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (self.disk_entries,))
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.stale_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.memory_entries,
+            "max_disk_entries": self.disk_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_errors": self.disk_errors,
+        }
+
+
+google_books_cache = GoogleBooksCache(
+    path=settings.GOOGLE_BOOKS_CACHE_PATH,
+    ttl_seconds=settings.GOOGLE_BOOKS_CACHE_TTL_SECONDS,
+    memory_entries=settings.GOOGLE_BOOKS_CACHE_MEMORY_ENTRIES,
+    disk_entries=settings.GOOGLE_BOOKS_CACHE_DISK_ENTRIES,
+    stale_seconds=settings.GOOGLE_BOOKS_CACHE_STALE_SECONDS,
+)
@@ -0,0 +1,77 @@
+# utils/http_client.py
+from typing import Optional
+import httpx
+from config.settings import settings
+
+
+class SharedHttpClient:
+    """
+    Process-wide httpx.AsyncClient for outbound API calls. Keeps TCP/TLS
+    connections alive between requests instead of handshaking on every call.
+    Opened and closed with the app's startup/shutdown events; any outbound
+    integration should call `http_client.get()` rather than build its own client.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.requests = 0
+        self.errors = 0
+
+    def start(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self.http2 = settings.HTTP_CLIENT_HTTP2
+            if self.http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    print("⚠️  HTTP_CLIENT_HTTP2 is set but the 'h2' package is missing, using HTTP/1.1")
+                    self.http2 = False
+
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(
+                    settings.HTTP_CLIENT_READ_TIMEOUT,
+                    connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+                ),
+                event_hooks={"request": [self._on_request]}
+            )
+        return self._client
+
+    def get(self) -> httpx.AsyncClient:
+        """The shared client, created on first use outside the app (e.g. scripts)"""
+        return self._client or self.start()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _on_request(self, request: httpx.Request):
+        self.requests += 1
+
+    def stats(self) -> dict:
+        connections = []
+        if self._client is not None:
+            # httpcore does not expose pool usage publicly; read it defensively
+            pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "open": self._client is not None,
+            "http2": self.http2,
+            "requests": self.requests,
+            "errors": self.errors,
+            "pool_connections": len(connections),
+            "pool_idle": idle,
+            "pool_active": len(connections) - idle,
+            "max_connections": settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        }
+
+
+http_client = SharedHttpClient()
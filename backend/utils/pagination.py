@@ -0,0 +1,37 @@
+# utils/pagination.py
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+
+# List endpoints keep returning plain JSON arrays for existing clients and
+# advertise the next page in this header instead
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_limit(limit: Optional[int], max_limit: int) -> Optional[int]:
+    """
+    Requested page size capped at max_limit, or None (the full result) when
+    the client didn't ask for a page; clients that predate pagination send
+    no limit and never read NEXT_CURSOR_HEADER.
+    """
+    if limit is None:
+        return None
+    return min(limit, max_limit)
+
+
+def encode_cursor(values: dict) -> str:
+    """Opaque keyset cursor: URL-safe base64 of the last row's sort key"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(400, "Invalid cursor")
+    if not isinstance(values, dict):
+        raise HTTPException(400, "Invalid cursor")
+    return values
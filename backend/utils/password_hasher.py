@@ -0,0 +1,99 @@
+# utils/password_hasher.py
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+from config.settings import settings
+
+
+def calibrate_bcrypt_rounds(budget_ms: float, min_rounds: int, max_rounds: int, samples: int = 3):
+    """
+    Pick the highest bcrypt cost whose hash time on this host fits budget_ms.
+    Each extra round doubles the work, so one measured cost is extrapolated.
+    Never goes below min_rounds, whatever the budget.
+    Returns (rounds, {rounds: estimated_ms}).
+    """
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.using(rounds=min_rounds).hash("bookswap-calibration")
+        timings.append((time.perf_counter() - started) * 1000)
+    base_ms = statistics.median(timings)
+
+    estimates = {rounds: base_ms * 2 ** (rounds - min_rounds) for rounds in range(min_rounds, max_rounds + 1)}
+    fitting = [rounds for rounds, estimate in estimates.items() if estimate <= budget_ms]
+    return (max(fitting) if fitting else min_rounds), estimates
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool so the
+    event loop keeps serving other requests while a hash is computed.
+    bcrypt releases the GIL, so threads give real parallelism here.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pwd-hash")
+        self.rounds = None  # bcrypt cost in use, set at startup
+        self.rehashed = 0
+        self.pending = 0  # submitted but not finished (queued + running)
+        self.running = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, func, *args):
+        """Run a blocking hashing call in the pool, shedding load when the queue is full"""
+        if self.max_pending > 0 and self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(503, "Server is busy, please try again shortly")
+
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, submitted_at, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def _timed(self, submitted_at: float, func, *args):
+        started_at = time.perf_counter()
+        self.running += 1
+        try:
+            return func(*args)
+        finally:
+            self.running -= 1
+            self.total_wait_seconds += started_at - submitted_at
+            self.total_run_seconds += time.perf_counter() - started_at
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "rounds": self.rounds,
+            "rehashed": self.rehashed,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "queue_depth": max(self.pending - self.running, 0),
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
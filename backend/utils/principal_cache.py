@@ -0,0 +1,111 @@
+# utils/principal_cache.py
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import make_transient_to_detached
+from config.settings import settings
+from models.user import User
+
+
+class PrincipalCache:
+    """
+    In-process TTL/LRU cache of authenticated users keyed by access token digest.
+    Stores a plain snapshot of the user's columns so a hit needs no DB round trip.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()  # token_key -> (expires_at, user_id, snapshot)
+        self._keys_by_user: dict = {}  # user_id -> set of token keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token_key: str) -> Optional[User]:
+        """Return a detached User for the token, or None on miss/expiry"""
+        entry = self._entries.get(token_key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user_id, snapshot = entry
+        if time.monotonic() >= expires_at:
+            self._remove(token_key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token_key)
+        self.hits += 1
+
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, token_key: str, user: User, token_expires: Optional[datetime] = None):
+        """Cache a user for the given token, never past the token's own expiry"""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+
+        ttl = self.ttl_seconds
+        if token_expires is not None:
+            ttl = min(ttl, (token_expires - datetime.utcnow()).total_seconds())
+            if ttl <= 0:
+                return
+
+        snapshot = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+        if token_key in self._entries:
+            self._remove(token_key)
+        self._entries[token_key] = (time.monotonic() + ttl, user.id, snapshot)
+        self._keys_by_user.setdefault(user.id, set()).add(token_key)
+
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate(self, token_key: str):
+        """Drop the entry for a single token (logout, refresh)"""
+        if token_key in self._entries:
+            self._remove(token_key)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every entry belonging to a user (password reset, profile change)"""
+        for token_key in list(self._keys_by_user.get(user_id, ())):
+            self._remove(token_key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, token_key: str):
+        _, user_id, _ = self._entries.pop(token_key)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(token_key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
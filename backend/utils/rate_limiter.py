@@ -0,0 +1,130 @@
+# utils/rate_limiter.py
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+from jose import JWTError, jwt
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from fastapi.responses import JSONResponse
+from config.settings import settings
+
+
+class RateLimiter:
+    """
+    Per-route token buckets for many clients in one bounded LRU map, plus a
+    cap on how many limited requests may run at once.
+
+    Each bucket is just (tokens, last_refill). When the map is full the least
+    recently seen key is dropped, which is the same as handing that client a
+    fresh bucket, so memory stays bounded however many distinct keys arrive.
+    """
+
+    def __init__(self, policies: dict, max_keys: int, max_in_flight: int):
+        self.policies = policies  # path -> (capacity, period_seconds)
+        self.max_keys = max_keys
+        self.max_in_flight = max_in_flight
+        self._buckets: OrderedDict = OrderedDict()  # "path|client" -> (tokens, last_refill)
+        self.in_flight = 0
+        self.evictions = 0
+        self.counters = {path: {"allowed": 0, "limited": 0, "shed": 0} for path in policies}
+
+    def acquire(self, key: str, capacity: int, period_seconds: float) -> float:
+        """Take one token; returns 0 when allowed, else seconds until one is available"""
+        rate = capacity / period_seconds
+        now = time.monotonic()
+
+        tokens, last_refill = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last_refill) * rate)
+
+        if tokens >= 1:
+            retry_after = 0.0
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._buckets),
+            "max_keys": self.max_keys,
+            "evictions": self.evictions,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "routes": self.counters,
+        }
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """
+    Fast 429s for the expensive routes configured in RATE_LIMIT_POLICIES,
+    keyed by authenticated user when a valid bearer token is sent and by
+    client IP otherwise. Sheds load with 503s once too many of those
+    requests are in flight at the same time.
+    """
+
+    def __init__(self, app, limiter: "RateLimiter"):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path.rstrip("/") or "/"
+        policy = self.limiter.policies.get(path)
+        if policy is None or request.method == "OPTIONS":
+            return await call_next(request)
+
+        capacity, period_seconds = policy
+        counters = self.limiter.counters[path]
+
+        retry_after = self.limiter.acquire(f"{path}|{self._client_key(request)}", capacity, period_seconds)
+        if retry_after > 0:
+            counters["limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, please try again later"},
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+        if self.limiter.max_in_flight > 0 and self.limiter.in_flight >= self.limiter.max_in_flight:
+            counters["shed"] += 1
+            return JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please try again shortly"},
+                headers={"Retry-After": "1"}
+            )
+
+        counters["allowed"] += 1
+        self.limiter.in_flight += 1
+        try:
+            return await call_next(request)
+        finally:
+            self.limiter.in_flight -= 1
+
+    def _client_key(self, request: Request) -> str:
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            username = self._verified_subject(authorization[7:])
+            if username:
+                return f"user:{username.lower()}"
+        # Behind a proxy this is the client IP uvicorn took from X-Forwarded-For (FORWARDED_ALLOW_IPS)
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    @staticmethod
+    def _verified_subject(token: str) -> Optional[str]:
+        # Verify the signature so nobody can drain another user's bucket
+        try:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+        except JWTError:
+            return None
+
+
+rate_limiter = RateLimiter(
+    policies=settings.rate_limit_policies,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    max_in_flight=settings.RATE_LIMIT_MAX_IN_FLIGHT,
+)
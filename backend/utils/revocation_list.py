@@ -0,0 +1,133 @@
+# utils/revocation_list.py
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.token import TokenTable
+
+
+class RevocationList:
+    """
+    In-memory set of revoked access-token jtis for stateless auth mode.
+    Loaded from the tokens table at startup and refreshed incrementally from
+    `revoked_at`, so a logout on any worker takes effect within one sync interval.
+    Entries are dropped once the access token they revoke has expired anyway,
+    and at most max_entries are kept (the soonest-expiring go first). Outside
+    stateless mode tokens are checked against the database and nothing is kept.
+    """
+
+    def __init__(self, sync_interval_seconds: int, max_entries: int):
+        self.sync_interval_seconds = sync_interval_seconds
+        self.max_entries = max_entries
+        self._revoked: dict = {}  # jti -> access token expiry
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.rejections = 0
+        self.syncs = 0
+        self.evictions = 0
+        self.last_error: Optional[str] = None
+
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti in self._revoked:
+            self.rejections += 1
+            return True
+        return False
+
+    def revoke(self, jti: Optional[str], expires: Optional[datetime]):
+        """Record a revocation made by this process without waiting for the next sync"""
+        if not settings.AUTH_STATELESS_TOKENS or not jti:
+            return
+        self._revoked[jti] = expires or datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        if len(self._revoked) > self.max_entries:
+            self._prune(datetime.utcnow())
+
+    async def load(self):
+        """Full load of every revoked, still-unexpired access token"""
+        self._revoked.clear()
+        self._synced_until = None
+        await self.sync()
+
+    async def sync(self):
+        """Pull revocations newer than the last sync"""
+        now = datetime.utcnow()
+        conditions = [
+            TokenTable.status == False,
+            TokenTable.access_token_jti.isnot(None),
+            TokenTable.access_token_expires > now,
+        ]
+        if self._synced_until is not None:
+            conditions.append(TokenTable.revoked_at >= self._synced_until)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(TokenTable.access_token_jti, TokenTable.access_token_expires).where(*conditions)
+            )
+            for jti, expires in result.all():
+                self._revoked[jti] = expires
+
+        # Overlap the next window slightly to tolerate clock skew between workers
+        self._synced_until = now - timedelta(seconds=self.sync_interval_seconds)
+        self._prune(now)
+        self.syncs += 1
+
+    def _prune(self, now: datetime):
+        expired = [jti for jti, expires in self._revoked.items() if expires <= now]
+        for jti in expired:
+            del self._revoked[jti]
+        if len(self._revoked) <= self.max_entries:
+            return
+        # Tokens closest to expiring anyway are the cheapest to forget; trim to
+        # 90% so a full list isn't re-sorted on every revoke
+        overflow = len(self._revoked) - int(self.max_entries * 0.9)
+        if overflow > 0:
+            for jti in sorted(self._revoked, key=self._revoked.get)[:overflow]:
+                del self._revoked[jti]
+            self.evictions += overflow
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sync_interval_seconds)
+            try:
+                await self.sync()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Revocation list sync failed: {str(e)}")
+
+    def start(self):
+        if self._task is None and self.sync_interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.AUTH_STATELESS_TOKENS,
+            "revoked_jtis": len(self._revoked),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "sync_interval_seconds": self.sync_interval_seconds,
+            "syncs": self.syncs,
+            "checks": self.checks,
+            "rejections": self.rejections,
+            "last_error": self.last_error,
+        }
+
+
+revocation_list = RevocationList(
+    sync_interval_seconds=settings.REVOCATION_SYNC_SECONDS,
+    max_entries=settings.REVOCATION_LIST_MAX_ENTRIES,
+)
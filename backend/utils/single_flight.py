@@ -0,0 +1,36 @@
+# utils/single_flight.py
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+    The first caller starts the work; everyone arriving before it finishes
+    awaits the same task and gets the same result (or exception).
+    The shared task is shielded, so one caller disconnecting doesn't cancel it for the rest.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: dict = {}  # key -> asyncio.Task
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        """Run `await func()` once per key among concurrent callers"""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,229 @@
+# utils/thumbnail_enricher.py
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import bindparam, func, or_, update
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.book import Book
+from models.work import Work, normalize_work_text
+from utils.google_books import search_google_books
+
+# Same max_results as /books/search, so lookups share its cache entries
+THUMBNAIL_LOOKUP_RESULTS = 10
+
+
+async def write_enrichment(db, batch: list) -> int:
+    """
+    Apply {"target_work_id", "new_thumbnail", "enriched_at"} lookup results in
+    the caller's transaction: one executemany UPDATE on works, and one copying
+    found thumbnails to that work's books. Returns the number of books filled.
+    """
+    works = Work.__table__
+    books = Book.__table__
+    mark_works = (
+        update(works)
+        .where(works.c.id == bindparam("target_work_id"))
+        .values(
+            thumbnail=func.coalesce(bindparam("new_thumbnail"), works.c.thumbnail),
+            enriched_at=bindparam("enriched_at")
+        )
+    )
+    # Copies that already have a cover keep it
+    fill_books = (
+        update(books)
+        .where(
+            books.c.work_id == bindparam("target_work_id"),
+            or_(books.c.thumbnail.is_(None), books.c.thumbnail == "")
+        )
+        .values(thumbnail=bindparam("new_thumbnail"))
+    )
+    await db.execute(mark_works, batch)
+    found = [row for row in batch if row["new_thumbnail"]]
+    if not found:
+        return 0
+    result = await db.execute(fill_books, found)
+    return result.rowcount
+
+
+def resolved_title_row(work_id, isbn: str, match: dict) -> dict:
+    """write_resolved_titles() row naming a work after its Google Books ISBN match"""
+    author = match.get("author")
+    return {
+        "target_work_id": work_id,
+        "provisional_title": isbn,
+        "new_title": match["title"],
+        "new_title_key": normalize_work_text(match["title"]),
+        "new_author": author if author and author != "Unknown" else None,
+    }
+
+
+async def write_resolved_titles(db, rows: list) -> int:
+    """
+    Replace provisional titles (the ISBN an import row came with) using
+    {"target_work_id", "provisional_title", "new_title", "new_title_key",
+    "new_author"} rows, on the work and on its books that still carry the
+    placeholder. Returns the number of books renamed.
+    """
+    works = Work.__table__
+    books = Book.__table__
+    rename_works = (
+        update(works)
+        .where(works.c.id == bindparam("target_work_id"), works.c.title == bindparam("provisional_title"))
+        .values(
+            title=bindparam("new_title"),
+            title_key=bindparam("new_title_key"),
+            author=func.coalesce(func.nullif(works.c.author, ""), bindparam("new_author"))
+        )
+    )
+    rename_books = (
+        update(books)
+        .where(books.c.work_id == bindparam("target_work_id"), books.c.title == bindparam("provisional_title"))
+        .values(
+            title=bindparam("new_title"),
+            author=func.coalesce(func.nullif(books.c.author, ""), bindparam("new_author"))
+        )
+    )
+    await db.execute(rename_works, rows)
+    result = await db.execute(rename_books, rows)
+    return result.rowcount
+
+
+class ThumbnailEnricher:
+    """
+    Background queue that fills Work.thumbnail from Google Books, so write
+    paths return without waiting on the network. Lookups happen once per
+    work and found thumbnails are copied to every Book of that work.
+    Works with an ISBN are looked up by it, which also replaces the ISBN
+    placeholder title of books imported without one. A fixed number of
+    workers bounds concurrent lookups and results are written in batches.
+    Lookups that fail or don't fit in the queue are picked up again by
+    scripts/backfill_thumbnails.py, which scans the works table.
+    """
+
+    def __init__(self, concurrency: int, batch_size: int, flush_seconds: float, queue_size: int):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._queued_ids: set = set()
+        self._results: list = []  # pending {"target_work_id", "new_thumbnail", "enriched_at"} rows
+        self._titles: list = []  # pending write_resolved_titles() rows
+        self._flush_lock = asyncio.Lock()
+        self._tasks: list = []
+        self.enqueued = 0
+        self.dropped = 0
+        self.found = 0
+        self.not_found = 0
+        self.failed = 0
+        self.updated = 0
+        self.titles_resolved = 0
+        self.flushes = 0
+        self.last_error: Optional[str] = None
+
+    def enqueue(self, work_id, title: str, isbn: Optional[str] = None) -> bool:
+        """
+        Schedule a thumbnail lookup for a work (by ISBN when known); returns
+        False if it was already queued or the queue is full
+        """
+        if work_id in self._queued_ids:
+            return False
+        try:
+            self._queue.put_nowait((work_id, title, isbn))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._queued_ids.add(work_id)
+        self.enqueued += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            work_id, title, isbn = await self._queue.get()
+            self._queued_ids.discard(work_id)
+            try:
+                if isbn:
+                    google_books = await search_google_books(isbn, max_results=1, field="isbn")
+                else:
+                    google_books = await search_google_books(title, max_results=THUMBNAIL_LOOKUP_RESULTS)
+                thumbnail_url = (google_books[0].get("thumbnail") if google_books else None) or None
+                # Only rows still titled by the ISBN are renamed (see write_resolved_titles)
+                if isbn and google_books:
+                    self._titles.append(resolved_title_row(work_id, isbn, google_books[0]))
+                if thumbnail_url:
+                    self.found += 1
+                else:
+                    self.not_found += 1
+                # Misses are recorded too, so the work isn't looked up again until the cache TTL passes
+                self._results.append({"target_work_id": work_id, "new_thumbnail": thumbnail_url, "enriched_at": datetime.utcnow()})
+                if len(self._results) >= self.batch_size:
+                    await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Failed to fetch thumbnail for '{title}': {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def flush(self):
+        """Write pending results with one executemany UPDATE per table"""
+        async with self._flush_lock:
+            if not self._results and not self._titles:
+                return
+            batch, self._results = self._results, []
+            titles, self._titles = self._titles, []
+            try:
+                async with AsyncSessionLocal() as db:
+                    # Titles first, so thumbnails land on the renamed rows in the same transaction
+                    if titles:
+                        self.titles_resolved += await write_resolved_titles(db, titles)
+                    if batch:
+                        self.updated += await write_enrichment(db, batch)
+                    await db.commit()
+                self.flushes += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Thumbnail batch update failed: {str(e)}")
+
+    def start(self):
+        if not self._tasks and self.concurrency > 0:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            self._tasks.append(asyncio.create_task(self._flusher()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "concurrency": self.concurrency,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "found": self.found,
+            "not_found": self.not_found,
+            "failed": self.failed,
+            "pending_updates": len(self._results) + len(self._titles),
+            "updated": self.updated,
+            "titles_resolved": self.titles_resolved,
+            "flushes": self.flushes,
+            "last_error": self.last_error,
+        }
+
+
+thumbnail_enricher = ThumbnailEnricher(
+    concurrency=settings.THUMBNAIL_ENRICH_CONCURRENCY,
+    batch_size=settings.THUMBNAIL_ENRICH_BATCH_SIZE,
+    flush_seconds=settings.THUMBNAIL_ENRICH_FLUSH_SECONDS,
+    queue_size=settings.THUMBNAIL_ENRICH_QUEUE_SIZE,
+)
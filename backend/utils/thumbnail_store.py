@@ -0,0 +1,258 @@
+# utils/thumbnail_store.py
+import asyncio
+import hashlib
+import io
+import os
+from collections import OrderedDict
+from typing import Optional, Tuple
+from PIL import Image
+from config.settings import settings
+from utils.http_client import http_client
+from utils.single_flight import SingleFlight
+
+
+class ThumbnailFetchError(Exception):
+    """The cover couldn't be fetched from its source URL"""
+
+
+class ThumbnailStore:
+    """
+    Content-addressed on-disk cache of book covers. Each source URL is
+    fetched once; the bytes are stored under their SHA-256 and every resized
+    variant is built right then, under "<hash>-w<width>". Files are evicted
+    least recently used first (by mtime, bumped on every read) once the
+    cache exceeds max_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, max_source_bytes: int, widths: Tuple[int, ...], max_urls: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_source_bytes = max_source_bytes
+        self.widths = widths
+        self.max_urls = max_urls
+        self._urls: OrderedDict = OrderedDict()  # source URL -> content hash (also persisted under urls/)
+        self._flight = SingleFlight("thumbnails")
+        self._evict_lock = asyncio.Lock()
+        self._size: Optional[int] = None  # bytes on disk, scanned on first use
+        self.hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+        self.resizes = 0
+        self.evictions = 0
+
+    # Public API
+
+    async def content_hash(self, url: str) -> str:
+        """Hash of the cover behind url, fetching and storing it on first use"""
+        digest = self._urls.get(url)
+        if digest is None:
+            digest = await asyncio.to_thread(self._read_url_entry, url)
+        if digest is None or not await asyncio.to_thread(os.path.exists, self._blob_path(digest)):
+            digest = await self._flight.do(url, lambda: self._fetch(url))
+        self._remember(url, digest)
+        return digest
+
+    async def read(self, digest: str, width: Optional[int]) -> Tuple[bytes, str]:
+        """(bytes, media type) for the original (width None) or a resized variant"""
+        name = digest if width is None else f"{digest}-w{width}"
+        data = await asyncio.to_thread(self._read_blob, name)
+        if data is not None:
+            self.hits += 1
+        else:
+            # Variants are built with the original, so this only follows an eviction
+            self.misses += 1
+            variants = await self._flight.do(digest, lambda: self._rebuild(digest))
+            data = variants[width]
+        return data, self._media_type(data)
+
+    @staticmethod
+    def etag(digest: str, width: Optional[int]) -> str:
+        return f'"{digest}"' if width is None else f'"{digest}-w{width}"'
+
+    # Fetching and resizing
+
+    async def _fetch(self, url: str) -> str:
+        try:
+            client = http_client.get()
+            async with client.stream("GET", url, follow_redirects=True) as response:
+                response.raise_for_status()
+                if not response.headers.get("content-type", "").startswith("image/"):
+                    raise ThumbnailFetchError(f"Not an image: {response.headers.get('content-type')}")
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.max_source_bytes:
+                        raise ThumbnailFetchError(f"Cover larger than {self.max_source_bytes} bytes")
+        except ThumbnailFetchError:
+            self.fetch_errors += 1
+            raise
+        except Exception as e:
+            self.fetch_errors += 1
+            http_client.errors += 1
+            raise ThumbnailFetchError(str(e))
+
+        data = bytes(body)
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            await self._store(digest, data)
+        except ThumbnailFetchError:
+            self.fetch_errors += 1
+            raise
+        await asyncio.to_thread(self._write_url_entry, url, digest)
+        return digest
+
+    async def _rebuild(self, digest: str) -> dict:
+        original = await asyncio.to_thread(self._read_blob, digest)
+        if original is None:
+            raise ThumbnailFetchError("Cover was evicted; retry")
+        return await self._store(digest, original)
+
+    async def _store(self, digest: str, original: bytes) -> dict:
+        """Write all resized variants, then the original; returns {width or None: bytes}"""
+        variants = await asyncio.to_thread(self._resize_all, original)
+        for width, data in variants.items():
+            name = digest if width is None else f"{digest}-w{width}"
+            await asyncio.to_thread(self._write_blob, name, data)
+        self.resizes += len(variants) - 1
+        await self._evict()
+        return variants
+
+    def _resize_all(self, original: bytes) -> dict:
+        try:
+            with Image.open(io.BytesIO(original)) as image:
+                image.load()
+                variants = {width: self._resize(image, width) for width in self.widths}
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ThumbnailFetchError(f"Unreadable image: {str(e)}")
+        # Original last: once it exists (what content_hash checks) the variants do too
+        variants[None] = original
+        return variants
+
+    @staticmethod
+    def _resize(image, width: int) -> bytes:
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+        return output.getvalue()
+
+    def _remember(self, url: str, digest: str):
+        self._urls[url] = digest
+        self._urls.move_to_end(url)
+        while len(self._urls) > self.max_urls:
+            self._urls.popitem(last=False)
+
+    @staticmethod
+    def _media_type(data: bytes) -> str:
+        if data.startswith(b"\x89PNG"):
+            return "image/png"
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "image/webp"
+        if data[:3] == b"GIF":
+            return "image/gif"
+        return "image/jpeg"
+
+    # Disk layout: blobs/<aa>/<name>, urls/<sha256(url)> -> content hash
+
+    def _blob_path(self, name: str) -> str:
+        return os.path.join(self.path, "blobs", name[:2], name)
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self.path, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def _read_blob(self, name: str) -> Optional[bytes]:
+        path = self._blob_path(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # LRU: mtime marks the last read
+        return data
+
+    def _write_blob(self, name: str, data: bytes):
+        if self._size is None:
+            self._size = self._scan_size()
+        path = self._blob_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # atomic, so readers never see a partial cover
+        self._size += len(data)
+
+    def _read_url_entry(self, url: str) -> Optional[str]:
+        try:
+            with open(self._url_path(url)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_url_entry(self, url: str, digest: str):
+        path = self._url_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(digest)
+
+    def _blob_files(self) -> list:
+        files = []
+        for directory, _, names in os.walk(os.path.join(self.path, "blobs")):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._blob_files())
+
+    async def _evict(self):
+        if self._size is None or self._size <= self.max_bytes:
+            return
+        async with self._evict_lock:
+            await asyncio.to_thread(self._evict_sync)
+
+    def _evict_sync(self):
+        files = sorted(self._blob_files())
+        total = sum(size for _, size, _ in files)
+        # Trim to 90% so eviction doesn't rerun on every write near the limit
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+        # url entries pointing at evicted blobs are re-fetched on next use
+        self._urls.clear()
+
+    def stats(self) -> dict:
+        return {
+            "urls": len(self._urls),
+            "widths": list(self.widths),
+            "disk_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetch_errors": self.fetch_errors,
+            "resizes": self.resizes,
+            "evictions": self.evictions,
+            "single_flight": self._flight.stats(),
+        }
+
+
+thumbnail_store = ThumbnailStore(
+    path=settings.THUMBNAIL_CACHE_PATH,
+    max_bytes=settings.THUMBNAIL_CACHE_MAX_BYTES,
+    max_source_bytes=settings.THUMBNAIL_MAX_SOURCE_BYTES,
+    widths=settings.thumbnail_variant_widths,
+    max_urls=settings.THUMBNAIL_URL_CACHE_MAX_ENTRIES,
+)
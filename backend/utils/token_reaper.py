@@ -0,0 +1,116 @@
+# utils/token_reaper.py
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import delete, select, or_, and_
+from config.database import AsyncSessionLocal
+from config.settings import settings
+from models.token import TokenTable
+
+
+class TokenReaper:
+    """
+    Periodically deletes expired or revoked rows from the tokens table in
+    bounded batches, so request handlers never have to scan it.
+    """
+
+    def __init__(self, interval_seconds: int, batch_size: int, max_batches: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.rows_reclaimed = 0
+        self.last_reclaimed = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def reapable_condition(self, now: datetime):
+        """Rows that can no longer authenticate anything"""
+        legacy_cutoff = now - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        return or_(
+            # Revoked rows are kept until their access token expires so the
+            # stateless revocation list can still be loaded from them
+            and_(
+                TokenTable.status == False,
+                or_(TokenTable.access_token_expires < now, TokenTable.access_token_expires.is_(None)),
+            ),
+            TokenTable.refresh_token_expires < now,
+            and_(TokenTable.refresh_token_expires.is_(None), TokenTable.access_token_expires < now),
+            and_(
+                TokenTable.refresh_token_expires.is_(None),
+                TokenTable.access_token_expires.is_(None),
+                TokenTable.created_date < legacy_cutoff,
+            ),
+        )
+
+    async def reap_once(self) -> int:
+        """Delete reapable rows batch by batch; returns rows reclaimed"""
+        now = datetime.utcnow()
+        reclaimed = 0
+
+        for _ in range(self.max_batches):
+            async with AsyncSessionLocal() as db:
+                batch_ids = (
+                    select(TokenTable.id)
+                    .where(self.reapable_condition(now))
+                    .limit(self.batch_size)
+                    .scalar_subquery()
+                )
+                result = await db.execute(delete(TokenTable).where(TokenTable.id.in_(batch_ids)))
+                await db.commit()
+
+            reclaimed += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+            await asyncio.sleep(0)  # let request handlers run between batches
+
+        self.runs += 1
+        self.last_reclaimed = reclaimed
+        self.rows_reclaimed += reclaimed
+        self.last_run_at = now
+        print(f"🧹 Token reaper reclaimed {reclaimed} rows")
+        return reclaimed
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reap_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Token reaper failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "rows_reclaimed": self.rows_reclaimed,
+            "last_reclaimed": self.last_reclaimed,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_error": self.last_error,
+        }
+
+
+token_reaper = TokenReaper(
+    interval_seconds=settings.TOKEN_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.TOKEN_REAPER_BATCH_SIZE,
+    max_batches=settings.TOKEN_REAPER_MAX_BATCHES,
+)
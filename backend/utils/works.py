@@ -0,0 +1,74 @@
+# utils/works.py
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.settings import settings
+from models.work import Work, make_work_key, normalize_work_text
+
+# Keys per SELECT when resolving many works at once
+_LOOKUP_CHUNK = 1000
+
+
+async def ensure_works(db: AsyncSession, entries: Iterable[Tuple[str, Optional[str], Optional[str], Optional[str]]]) -> dict:
+    """
+    Find or create the works for (title, author, isbn, thumbnail) entries
+    inside the caller's transaction, returning {work_key: row} where row has
+    id, title, thumbnail and enriched_at. A known thumbnail fills a work that has none.
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for title, author, isbn, thumbnail in entries:
+        key = make_work_key(title, author, isbn)
+        if key not in rows:
+            rows[key] = {
+                "id": uuid.uuid4(),
+                "work_key": key,
+                "isbn": isbn,
+                "title": title,
+                "title_key": normalize_work_text(title),
+                "author": author,
+                "thumbnail": thumbnail,
+                "enriched_at": now if thumbnail else None,
+                "created_at": now,
+            }
+        elif thumbnail and not rows[key]["thumbnail"]:
+            rows[key].update(thumbnail=thumbnail, enriched_at=now)
+    if not rows:
+        return {}
+
+    # Concurrent creators of the same work converge on one row via the unique work_key
+    works = Work.__table__
+    statement = pg_insert(works)
+    statement = statement.on_conflict_do_update(
+        index_elements=[works.c.work_key],
+        set_={"thumbnail": statement.excluded.thumbnail, "enriched_at": statement.excluded.enriched_at},
+        where=works.c.thumbnail.is_(None) & statement.excluded.thumbnail.isnot(None)
+    )
+    await db.execute(statement, list(rows.values()))
+
+    found = {}
+    keys = list(rows)
+    for start in range(0, len(keys), _LOOKUP_CHUNK):
+        result = await db.execute(
+            select(Work.work_key, Work.id, Work.title, Work.thumbnail, Work.enriched_at)
+            .where(Work.work_key.in_(keys[start:start + _LOOKUP_CHUNK]))
+        )
+        for row in result.all():
+            found[row.work_key] = row
+    return found
+
+
+async def get_or_create_work(db: AsyncSession, title: str, author: Optional[str], isbn: Optional[str] = None):
+    """Single-book form of ensure_works; returns the work's (id, title, thumbnail, enriched_at) row"""
+    works = await ensure_works(db, [(title, author, isbn, None)])
+    return works[make_work_key(title, author, isbn)]
+
+
+def needs_enrichment(thumbnail: Optional[str], enriched_at: Optional[datetime]) -> bool:
+    """True if the work has no thumbnail and hasn't been looked up within the Google Books cache TTL"""
+    if thumbnail:
+        return False
+    return enriched_at is None or enriched_at < datetime.utcnow() - timedelta(seconds=settings.GOOGLE_BOOKS_CACHE_TTL_SECONDS)